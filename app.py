@@ -1,11 +1,19 @@
+import os
+import logging
 import streamlit as st
 import pandas as pd
-from components import dashboard, news_feed, analysis, portfolio
+from components import dashboard, news_feed, analysis, portfolio, timing
+from utils import prefetch, tracing
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logging.basicConfig(
+    level=os.environ.get("MARKETPULSE_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 # Page Config
 st.set_page_config(
     page_title="MarketPulseAI",
@@ -105,6 +113,11 @@ if 'current_topic' not in st.session_state:
     st.session_state.current_topic = None
 
 def main():
+    # Keep the trending sectors warm in the background (one warmer per process)
+    prefetch.start_warmer()
+    # Local Prometheus endpoint, when MARKETPULSE_METRICS_PORT is set
+    tracing.start_metrics_server()
+    
     st.sidebar.title("MarketPulseAI 📈")
     st.sidebar.markdown("---")
     
@@ -113,6 +126,7 @@ def main():
     
     st.sidebar.markdown("---")
     st.sidebar.info("Powered by Gemini 2.5 Flash")
+    timing.render_timing_sidebar()
     
     if view == "Dashboard":
         if st.session_state.step == 1:
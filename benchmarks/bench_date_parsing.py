@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: news freshness date parsing.
+
+Compares the previous approach (dateutil.parser.parse + stripping tzinfo) with
+utils.date_parser.parse_news_date on a synthetic corpus shaped like search results.
+
+Usage:
+    python benchmarks/bench_date_parsing.py [--size 5000] [--repeat 5]
+"""
+import os
+import sys
+import random
+import argparse
+import timeit
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dateutil.parser
+from utils.date_parser import parse_news_date
+
+def build_corpus(size: int, seed: int = 42):
+    """Mostly ISO-8601 (what the backend returns) with a tail of other layouts."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    corpus = []
+    for _ in range(size):
+        moment = now - timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+        roll = rng.random()
+        if roll < 0.80:
+            corpus.append(moment.isoformat(timespec="seconds"))
+        elif roll < 0.90:
+            corpus.append(moment.strftime("%a, %d %b %Y %H:%M:%S +0000"))
+        elif roll < 0.95:
+            corpus.append(moment.strftime("%b %d, %Y"))
+        else:
+            corpus.append(f"{rng.randint(1, 48)} hours ago")
+    return corpus
+
+def legacy_parse(value: str):
+    """The parsing previously inlined in news_scraper.get_sector_news."""
+    try:
+        parsed = dateutil.parser.parse(value)
+        if parsed.tzinfo is not None:
+            parsed = parsed.replace(tzinfo=None)
+        return parsed
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=5000, help="number of dates in the corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size)
+
+    legacy_failures = sum(legacy_parse(d) is None for d in corpus)
+    new_failures = sum(parse_news_date(d) is None for d in corpus)
+
+    legacy = min(timeit.repeat(lambda: [legacy_parse(d) for d in corpus], number=1, repeat=args.repeat))
+    new = min(timeit.repeat(lambda: [parse_news_date(d) for d in corpus], number=1, repeat=args.repeat))
+
+    print(f"Corpus: {len(corpus)} dates")
+    print(f"{'parser':<28}{'total ms':>10}{'us/date':>10}{'unparsed':>10}")
+    print(f"{'dateutil (previous)':<28}{legacy * 1000:>10.1f}{legacy / len(corpus) * 1e6:>10.2f}{legacy_failures:>10}")
+    print(f"{'parse_news_date':<28}{new * 1000:>10.1f}{new / len(corpus) * 1e6:>10.2f}{new_failures:>10}")
+    print(f"Speed-up: {legacy / new:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Stage-level latency benchmark of the analysis path.
+
+Runs news search -> scrape -> prompt build -> LLM -> JSON parse -> price enrichment ->
+portfolio write for many iterations, fully offline: external calls go through the
+record/replay layer (utils/replay.py). Recorded fixtures are used when present, and
+synthetic stand-ins answer everything else. The Supabase client is replaced by an
+in-memory one. Caches are cleared every iteration so each stage does its full work.
+
+Reports p50/p95/p99 per stage, the peak traced allocation per stage (from a separate
+tracemalloc pass) and the process peak RSS, and saves everything as JSON under
+benchmarks/results/ so runs on different commits can be compared.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--iterations 50] [--articles 8] [--latency 0]
+                                        [--fixtures DIR] [--baseline results/previous.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+# Keep the benchmark's caches away from the app's
+os.environ.setdefault("MARKETPULSE_CACHE_DIR", tempfile.mkdtemp(prefix="marketpulse-bench-"))
+
+from streamlit import config as st_config
+from streamlit.logger import set_log_level
+from utils import replay, news_scraper, ai_engine, json_stream, quotes, article_index, db, data_handler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ["news", "scrape", "prompt", "llm", "parse", "price", "portfolio_write"]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+TOPIC = "Semiconductors"
+TICKERS = ["NVDA", "AMD", "TSM", "AVGO", "INTC", "QCOM", "MU", "ASML"]
+
+WORDS = ("chip demand revenue guidance quarter analysts margin supply capacity foundry shares "
+         "investors growth datacenter inventory export outlook earnings forecast").split()
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+# --- Offline stand-ins --------------------------------------------------------------------
+
+def install_stand_ins(seed: int, latency: float):
+    """Synthetic answers for every external service, each delayed by `latency` seconds."""
+    rng = random.Random(seed)
+
+    def news(key):
+        time.sleep(latency)
+        now = datetime.now(timezone.utc).isoformat()
+        return {"recorded_at": time.time(), "results": [
+            {
+                "title": f"{rng.choice(TICKERS)} {_sentence(rng)}",
+                "source": f"Source {i % 5}",
+                "date": now,
+                "url": f"https://news.example.com/{seed}/{i}",
+                "body": _sentence(rng)
+            }
+            for i in range(key["max_results"])
+        ]}
+
+    def page(key):
+        time.sleep(latency)
+        paragraphs = "".join(f"<p>{' '.join(_sentence(rng) for _ in range(4))}</p>" for _ in range(12))
+        html = f"<html><head><title>Article</title></head><body><article>{paragraphs}</article></body></html>"
+        return replay._encode_page({"status": 200, "html": html.encode("utf-8"), "etag": None, "last_modified": None})
+
+    def gemini(key):
+        time.sleep(latency)
+        report = json.dumps({
+            "sentiment": "Positive",
+            "summary": [_sentence(rng) for _ in range(5)],
+            "recommendations": [
+                {
+                    "ticker": ticker, "company_name": ticker, "reasoning": _sentence(rng),
+                    "action": rng.choice(["BUY", "SELL", "WATCH", "AVOID"]), "price": "100",
+                    "short_term_plan": _sentence(rng), "long_term_plan": _sentence(rng)
+                }
+                for ticker in TICKERS[:5]
+            ]
+        })
+        chunks = [report[i:i + 40] for i in range(0, len(report), 40)]
+        return {"chunks": chunks, "usage": {"prompt_tokens": len(key[2]) // 4, "output_tokens": len(report) // 4}}
+
+    def prices(key):
+        time.sleep(latency)
+        tickers = key["tickers"]
+        index = pd.date_range(end=pd.Timestamp.now().normalize(), periods=5, freq="D")
+        columns = pd.MultiIndex.from_tuples([("Close", t) for t in tickers])
+        return replay._encode_frame(pd.DataFrame(np.random.default_rng(seed).uniform(50, 500, (5, len(tickers))),
+                                                 index=index, columns=columns))
+
+    replay.set_stand_in("ddgs", news)
+    replay.set_stand_in("http", page)
+    replay.set_stand_in("gemini", gemini)
+    replay.set_stand_in("yfinance", prices)
+
+class _MemoryTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def insert(self, data):
+        self.rows.append(dict(data))
+        return self
+
+    def execute(self):
+        return self
+
+class _MemoryClient:
+    """In-memory stand-in for the Supabase client (insert only)."""
+
+    def __init__(self):
+        self.rows = []
+
+    def table(self, name):
+        return _MemoryTable(self.rows)
+
+# --- Benchmark ----------------------------------------------------------------------------
+
+def reset_caches():
+    news_scraper.content_cache.clear()
+    ai_engine.analysis_cache.clear()
+    with quotes._cache_lock:
+        quotes._quote_cache.clear()
+
+def run_once(articles: int, timings: dict, allocations: dict = None):
+    """One pass over every stage; durations (and allocation peaks if tracing) go into the dicts."""
+    state = {}
+
+    def stage(name, fn):
+        if allocations is not None:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn()
+        timings[name].append(time.perf_counter() - start)
+        if allocations is not None:
+            allocations[name].append(tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+    reset_caches()
+    news = stage("news", lambda: news_scraper.get_sector_news(TOPIC, max_results=articles))
+    stage("scrape", lambda: news_scraper.scrape_articles([item["url"] for item in news]))
+    prepared = stage("prompt", lambda: ai_engine._prepare_analysis(news, mode="single"))
+
+    def llm():
+        model = replay.generative_model(ai_engine.ANALYSIS_MODEL)
+        response = model.generate_content(prepared["prompt"], generation_config={"response_mime_type": "application/json"}, stream=True)
+        return [replay.chunk_text(chunk) for chunk in response]
+    chunks = stage("llm", llm)
+
+    def parse():
+        parser = json_stream.IncrementalJSONParser(stream_arrays=["recommendations"])
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.result()
+    state["analysis"] = stage("parse", parse)
+
+    stage("price", lambda: ai_engine._enrich_prices(state["analysis"]))
+    stage("portfolio_write", lambda: [
+        data_handler.add_to_portfolio(rec, TOPIC) for rec in state["analysis"].get("recommendations", [])
+    ])
+
+def summarize(timings: dict, allocations: dict) -> dict:
+    stages = {}
+    for name in STAGES:
+        values = np.array(timings[name]) * 1000
+        stages[name] = {
+            "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3),
+            "p99_ms": round(float(np.percentile(values, 99)), 3),
+            "mean_ms": round(float(values.mean()), 3),
+            "peak_alloc_kb": round(max(allocations[name]) / 1024, 1) if allocations[name] else None
+        }
+    return stages
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)  # bytes on macOS, KB elsewhere
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50, help="timed passes over the whole path")
+    parser.add_argument("--articles", type=int, default=8, help="articles per pass")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each stand-in call sleeps (simulated network time)")
+    parser.add_argument("--fixtures", default=None, help="directory with recorded fixtures (default: stand-ins only)")
+    parser.add_argument("--alloc-iterations", type=int, default=3, help="extra passes under tracemalloc")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare p50s against")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    replay.REPLAY_MODE = "replay"
+    replay.FIXTURES_DIR = args.fixtures or tempfile.mkdtemp(prefix="marketpulse-fixtures-")
+    install_stand_ins(args.seed, args.latency)
+    db.get_client = _MemoryClient
+
+    # Streamlit calls outside a running app only log warnings, and so does the app along this
+    # path; the log calls still run (they are part of its overhead), nothing below ERROR is shown.
+    # Parsing Streamlit's config resets its log level, so parse it before lowering the noise.
+    st_config.get_config_options()
+    set_log_level("error")
+    logging.getLogger("utils").setLevel(logging.ERROR)
+
+    timings = {name: [] for name in STAGES}
+    allocations = {name: [] for name in STAGES}
+    run_once(args.articles, {name: [] for name in STAGES})  # Warm-up: imports, SQLite schemas, thread pools
+
+    for _ in range(args.iterations):
+        run_once(args.articles, timings)
+
+    tracemalloc.start()
+    for _ in range(args.alloc_iterations):
+        run_once(args.articles, {name: [] for name in STAGES}, allocations)
+    tracemalloc.stop()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            "iterations": args.iterations, "articles": args.articles, "latency": args.latency,
+            "fixtures": bool(args.fixtures), "seed": args.seed
+        },
+        "stages": summarize(timings, allocations),
+        "total_p50_ms": round(float(np.percentile(np.sum([timings[name] for name in STAGES], axis=0) * 1000, 50)), 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "indexed_articles": article_index.stats()["articles"]
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+
+    print(f"{args.iterations} iterations, {args.articles} articles, stand-in latency {args.latency}s")
+    print(f"{'stage':<17}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc KB':>11}" + (f"{'vs base':>10}" if baseline else ""))
+    for name, stats in results["stages"].items():
+        line = f"{name:<17}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['peak_alloc_kb']:>11.1f}"
+        if baseline and name in baseline and baseline[name]["p50_ms"]:
+            line += f"{(stats['p50_ms'] / baseline[name]['p50_ms'] - 1) * 100:>+9.1f}%"
+        print(line)
+    print(f"Total p50: {results['total_p50_ms']:.2f} ms, peak RSS: {results['peak_rss_mb']} MB")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"pipeline-{results['commit'] or 'local'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {path}")
+
+if __name__ == "__main__":
+    main()
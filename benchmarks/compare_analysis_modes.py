@@ -0,0 +1,60 @@
+"""
+Comparison: single-prompt vs map-reduce analysis.
+
+Fetches news for a topic, then analyzes the same article selection with both modes of
+utils.ai_engine.analyze_news (bypassing the analysis cache; the articles are scraped once
+beforehand so both modes read them from the article cache) and reports wall-clock time,
+number of Gemini calls and the prompt/output tokens Gemini billed for each run.
+Needs GOOGLE_API_KEY and network access.
+
+Usage:
+    python benchmarks/compare_analysis_modes.py [--topic "Semiconductors"] [--articles 12] [--repeat 1]
+"""
+import os
+import sys
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import ai_engine, news_scraper
+
+MODES = ["single", "map_reduce"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topic", default="Semiconductors", help="news topic to analyze")
+    parser.add_argument("--articles", type=int, default=12, help="number of articles to select")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per mode (median is reported)")
+    args = parser.parse_args()
+
+    news = news_scraper.get_sector_news(args.topic, max_results=args.articles)
+    if not news:
+        print(f"No news found for {args.topic!r}.")
+        return
+    print(f"Topic: {args.topic} ({len(news)} articles, map concurrency {ai_engine.MAP_CONCURRENCY})")
+
+    # Download the articles before timing, so neither mode pays for cold scrapes
+    scraped = news_scraper.scrape_articles([item["url"] for item in news if item.get("url")])
+    print(f"Scraped {len(scraped['content'])} article bodies in {scraped['elapsed']:.2f}s (not timed)")
+
+    runs = {mode: [] for mode in MODES}
+    for i in range(args.repeat):
+        # Alternate which mode goes first to even out any remaining warm-up effects
+        for mode in (MODES if i % 2 == 0 else MODES[::-1]):
+            result = ai_engine.analyze_news(news, mode=mode, use_cache=False)
+            runs[mode].append(result["run_stats"])
+
+    print(f"{'mode':<14}{'wall s':>10}{'calls':>8}{'in tokens':>12}{'out tokens':>12}")
+    for mode in MODES:
+        stats = runs[mode]
+        print(
+            f"{mode:<14}"
+            f"{statistics.median(s['wall_clock'] for s in stats):>10.2f}"
+            f"{stats[-1]['llm_calls']:>8}"
+            f"{statistics.median(s['prompt_tokens'] for s in stats):>12,.0f}"
+            f"{statistics.median(s['output_tokens'] for s in stats):>12,.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
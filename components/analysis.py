@@ -1,5 +1,75 @@
+import pandas as pd
 import streamlit as st
-from utils import ai_engine, data_handler
+from utils import ai_engine, data_handler, pipeline, tracing
+from utils.chat_session import AnalystChatSession
+
+def _render_sentiment_banner(sentiment: str):
+    color_map = {
+        "Positive": "#4CAF50", # Material Green
+        "Negative": "#F44336", # Material Red
+        "Neutral": "#9E9E9E"   # Material Grey
+    }
+    color = color_map.get(sentiment, "#9E9E9E")
+    
+    st.markdown(f"""
+    <div style="background-color: {color}33; 
+                padding: 15px; border-radius: 10px; border-left: 5px solid {color}; margin-bottom: 20px;">
+        <h3 style="margin:0; color: {color};">Market Sentiment: {str(sentiment).upper()}</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
+def _render_summary(summary_points):
+    if isinstance(summary_points, list):
+        st.subheader("📝 Executive Summary")
+        for point in summary_points:
+            st.markdown(f"- {point}")
+    else:
+        st.markdown(f"<p style='margin-top: 10px; font-size: 1.1em;'>{summary_points}</p>", unsafe_allow_html=True)
+
+def _stream_analysis(selected_articles, topic):
+    """
+    Runs the analysis in streaming mode, drawing the sentiment banner, summary and each
+    recommendation as soon as they are generated. Stores the final report in session state.
+    The work runs on the shared pipeline loop; this script thread only waits for events.
+    """
+    st.markdown(f"## 📊 Market Analysis: **{topic}**")
+    status = st.empty()
+    status.caption("Reading the selected articles...")
+    banner = st.empty()
+    summary = st.empty()
+    recs_area = st.container()
+    
+    to_scrape = sum(1 for item in selected_articles if item.get("url"))
+    scraped = 0
+    # Spans from every stage (including worker threads) are collected for the sidebar waterfall
+    with tracing.trace("analysis") as run_trace:
+        try:
+            for event in pipeline.start(topic=topic, articles=selected_articles).events():
+                if event["type"] == "scraped":
+                    scraped += 1
+                    status.caption(f"Reading the selected articles... ({scraped}/{to_scrape})")
+                    if scraped == to_scrape:
+                        status.caption("Analyzing market sentiment and generating recommendations...")
+                elif event["type"] == "sentiment":
+                    with banner.container():
+                        _render_sentiment_banner(event["value"])
+                elif event["type"] == "summary":
+                    with summary.container():
+                        _render_summary(event["value"])
+                elif event["type"] == "recommendation":
+                    stock = event["value"]
+                    with recs_area:
+                        st.markdown(f"**{stock.get('ticker')}** — {stock.get('action', 'WATCH').upper()} at ${stock.get('price')}")
+                elif event["type"] == "done":
+                    st.session_state.analysis_result = event["result"]
+            status.empty()
+            st.session_state.analysis_error = None
+        except Exception as e:
+            # Shown by render_analysis after the rerun, above the fallback report
+            st.session_state.analysis_error = str(e)
+            st.session_state.analysis_result = ai_engine.MOCK_ANALYSIS
+    st.session_state.last_trace = run_trace.waterfall()
+    st.session_state.analysis_topic = topic
 
 def render_analysis():
     """
@@ -20,45 +90,61 @@ def render_analysis():
     # Run analysis if not already done for this selection
     # We track 'analysis_topic' to know if we need to re-run
     if "analysis_result" not in st.session_state or st.session_state.get("analysis_topic") != topic:
-        with st.spinner("Analyzing market sentiment and generating recommendations..."):
-            try:
-                st.session_state.analysis_result = ai_engine.analyze_news(selected_articles)
-                st.session_state.analysis_topic = topic
-            except Exception as e:
-                st.error(f"Analysis Failed: {str(e)}")
-                st.warning("⚠️ API Call Failed. Showing Fallback/Mock Data for debugging.")
-                st.session_state.analysis_result = ai_engine.MOCK_ANALYSIS
-                st.session_state.analysis_topic = topic
+        _stream_analysis(selected_articles, topic)
+        st.rerun() # Redraw the finished report with its interactive controls
 
     result = st.session_state.analysis_result
     
+    if st.session_state.get("analysis_error"):
+        st.error(f"Analysis Failed: {st.session_state.analysis_error}")
+        st.warning("⚠️ API Call Failed. Showing Fallback/Mock Data for debugging.")
+    
     # Header
     st.markdown(f"## 📊 Market Analysis: **{topic}**")
     
     # Sentiment Banner
-    sentiment = result.get("sentiment", "Neutral")
-    color_map = {
-        "Positive": "#4CAF50", # Material Green
-        "Negative": "#F44336", # Material Red
-        "Neutral": "#9E9E9E"   # Material Grey
-    }
-    color = color_map.get(sentiment, "#9E9E9E")
+    _render_sentiment_banner(result.get("sentiment", "Neutral"))
+
+    cache_info = result.get("cache", {})
+    if cache_info.get("hit"):
+        st.caption(f"♻️ Reused an analysis of the same articles from {max(1, cache_info['age'] // 60)} min ago. Prices were refreshed.")
     
-    st.markdown(f"""
-    <div style="background-color: {color}33; 
-                padding: 15px; border-radius: 10px; border-left: 5px solid {color}; margin-bottom: 20px;">
-        <h3 style="margin:0; color: {color};">Market Sentiment: {sentiment.upper()}</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    # Articles that could not be scraped in time were analyzed from their snippet only
+    scrape_report = result.get("scrape_report", {})
+    if scrape_report.get("timed_out"):
+        st.caption(f"⏱️ {len(scrape_report['timed_out'])} article(s) timed out during scraping and were analyzed from their snippet only.")
+    if result.get("duplicates_collapsed"):
+        st.caption(f"🔁 {result['duplicates_collapsed']} near-duplicate article(s) were merged before analysis.")
+    if result.get("pruned"):
+        with st.expander(f"✂️ {len(result['pruned'])} low-relevance article(s) were left out of the analysis"):
+            for item in result["pruned"]:
+                st.caption(f"{item['headline']} (relevance {item['relevance']:.2f})")
+    run_stats = result.get("run_stats", {})
+    if run_stats.get("llm_calls"):
+        mode_label = "map-reduce" if run_stats["mode"] == "map_reduce" else "single prompt"
+        st.caption(
+            f"🧮 {mode_label}: {run_stats['llm_calls']} Gemini call(s), "
+            f"{run_stats['prompt_tokens']:,} in / {run_stats['output_tokens']:,} out tokens, {run_stats['wall_clock']}s."
+        )
+
+    # How much each article body was compressed to fit the prompt budget
+    compression = result.get("compression")
+    if compression and compression.get("articles"):
+        budget_label = " per article" if run_stats.get("mode") == "map_reduce" else ""
+        with st.expander(f"🗜️ Context Compression (~{compression['prompt_tokens']:,} tokens, budget {compression['budget_tokens']:,}{budget_label})"):
+            st.dataframe(
+                pd.DataFrame(compression["articles"]).rename(columns={
+                    "headline": "Headline",
+                    "original_tokens": "Original Tokens",
+                    "compressed_tokens": "Sent Tokens",
+                    "ratio": "Ratio"
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
 
     # Detailed Summary
-    summary_points = result.get("summary", [])
-    if isinstance(summary_points, list):
-        st.subheader("📝 Executive Summary")
-        for point in summary_points:
-            st.markdown(f"- {point}")
-    else:
-        st.markdown(f"<p style='margin-top: 10px; font-size: 1.1em;'>{result.get('summary')}</p>", unsafe_allow_html=True)
+    _render_summary(result.get("summary", []))
     
     # Recommendations
     st.subheader("🎯 Stock Recommendations")
@@ -80,12 +166,18 @@ def render_analysis():
             with st.container(border=True):
                 st.markdown(f"### {stock.get('ticker')}")
                 st.caption(stock.get('company_name'))
+                if stock.get('llm_ticker'):
+                    st.caption(f"Symbol corrected from {stock['llm_ticker']}")
+                elif stock.get('ticker_verified') is False:
+                    st.caption("⚠️ Symbol not in the local ticker table")
                 
                 action = stock.get('action', 'WATCH').upper()
                 action_color = "#4CAF50" if action in ["BUY", "WATCH"] else "#F44336"
                 
                 st.markdown(f"**Action:** <span style='color:{action_color}'>{action}</span>", unsafe_allow_html=True)
                 st.markdown(f"**Est. Price:** ${stock.get('price')}")
+                if stock.get('price_as_of'):
+                    st.caption(f"Quote as of {stock['price_as_of']}")
                 st.markdown(f"*{stock.get('reasoning')}*")
                 
                 with st.expander("Strategy Details"):
@@ -105,6 +197,7 @@ def render_analysis():
         st.session_state.step = 1
         st.session_state.current_topic = None
         st.session_state.chat_history = [] # Reset chat history
+        st.session_state.pop("chat_session", None)
         st.rerun()
 
     # --- Contextual Chat Assistant ---
@@ -115,6 +208,11 @@ def render_analysis():
     # Initialize chat history
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    # One session per analysis: it holds the model, the context and the running memory
+    session = st.session_state.get("chat_session")
+    if session is None or session.context_data is not result:
+        session = AnalystChatSession(result, st.session_state.chat_history)
+        st.session_state.chat_session = session
 
     # Display chat messages from history on app rerun
     for message in st.session_state.chat_history:
@@ -131,13 +229,8 @@ def render_analysis():
 
         # Display assistant response in chat message container
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = ai_engine.chat_with_analyst(
-                    user_query=prompt,
-                    context_data=result,
-                    chat_history=st.session_state.chat_history
-                )
-                st.markdown(response)
+            # Render tokens as they arrive; write_stream returns the full text
+            response = st.write_stream(session.ask_stream(prompt))
         
         # Add assistant response to chat history
         st.session_state.chat_history.append({"role": "assistant", "content": response})
@@ -1,4 +1,13 @@
 import streamlit as st
+from utils import news_scraper, article_index
+
+# Date filters for the local archive search (label -> days, None = no limit)
+LOCAL_SEARCH_WINDOWS = {
+    "Last 3 days": 3,
+    "Last week": 7,
+    "Last month": 30,
+    "Any time": None
+}
 
 def render_dashboard():
     """
@@ -22,15 +31,7 @@ def render_dashboard():
     
     with col1:
         st.subheader("🔥 Trending Sectors")
-        trending_topics = [
-            "Artificial Intelligence",
-            "Green Energy",
-            "Cryptocurrency",
-            "Biotech",
-            "Semiconductors"
-        ]
-        
-        for topic in trending_topics:
+        for topic in news_scraper.TRENDING_TOPICS:
             if st.button(f"Analyze {topic}", key=f"btn_{topic}", use_container_width=True):
                 st.session_state.current_topic = topic
                 st.session_state.step = 2 # Move to News Ingestion
@@ -49,3 +50,24 @@ def render_dashboard():
                 st.rerun()
             else:
                 st.warning("Please enter a topic to search.")
+        
+        # Instant results from articles we have already ingested, no network needed
+        if search_query:
+            window = st.selectbox("Published within", list(LOCAL_SEARCH_WINDOWS), index=1, key="local_search_window")
+            local_results = article_index.search(search_query, since_days=LOCAL_SEARCH_WINDOWS[window], limit=10)
+            
+            if local_results:
+                st.caption(f"📚 {len(local_results)} matching article(s) in the local archive")
+                for item in local_results:
+                    st.markdown(f"- [{item['headline']}]({item['url']}) — {item['source']}, {item['date']}")
+                
+                if st.button("Analyze Archived Articles", key="local_search_btn", use_container_width=True):
+                    st.session_state.current_topic = search_query
+                    st.session_state.fetched_news = local_results
+                    st.session_state.news_topic = search_query
+                    st.session_state.news_age = 0
+                    st.session_state.selected_indices = [i for i in range(len(local_results))]
+                    st.session_state.step = 2 # Skip the live search, go straight to article selection
+                    st.rerun()
+            else:
+                st.caption("No matching articles in the local archive yet.")
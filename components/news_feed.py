@@ -1,6 +1,7 @@
 import pandas as pd
 import streamlit as st
-from utils import ai_engine
+from utils import ai_engine, prefetch, sentiment_lexicon
+from utils.scrape_queue import scrape_queue
 
 def render_news_feed():
     """
@@ -25,13 +26,26 @@ def render_news_feed():
     # Fetch news if not already in session state or if topic changed
     # We use a separate key 'news_topic' to track which topic the current news belongs to
     if "fetched_news" not in st.session_state or st.session_state.get("news_topic") != topic:
-        with st.spinner(f"Fetching latest news for {topic}..."):
-            st.session_state.fetched_news = ai_engine.fetch_news(topic)
+        # Serve recently prefetched news straight from the shared cache when we have it
+        warm = prefetch.get_warm_news(topic)
+        if warm:
+            st.session_state.fetched_news, st.session_state.news_age = warm
             st.session_state.news_topic = topic
-            # Reset selection when new news is fetched
             st.session_state.selected_indices = [i for i in range(len(st.session_state.fetched_news))]
+    
+    if "fetched_news" not in st.session_state or st.session_state.get("news_topic") != topic:
+        with st.spinner(f"Fetching latest news for {topic}..."):
+            st.session_state.fetched_news = ai_engine.fetch_news(topic)
+        st.session_state.news_topic = topic
+        st.session_state.news_age = 0
+        if st.session_state.fetched_news:
+            prefetch.store_news(topic, st.session_state.fetched_news)
+        # Reset selection when new news is fetched
+        st.session_state.selected_indices = [i for i in range(len(st.session_state.fetched_news))]
 
     news_items = st.session_state.fetched_news
+    if any("relevance" not in item for item in news_items):
+        sentiment_lexicon.score_news(news_items, topic)
     
     if not news_items:
         st.warning(f"No recent news found for {topic} (last 3 days).")
@@ -39,7 +53,8 @@ def render_news_feed():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Use Mock Data"):
-                st.session_state.fetched_news = ai_engine.MOCK_NEWS
+                st.session_state.fetched_news = [dict(item) for item in ai_engine.MOCK_NEWS]
+                st.session_state.news_age = 0
                 st.session_state.selected_indices = [i for i in range(len(ai_engine.MOCK_NEWS))]
                 st.rerun()
         with col2:
@@ -48,8 +63,18 @@ def render_news_feed():
                 st.rerun()
         return
 
+    # Start downloading every article in the background while the user reviews the list,
+    # so "Process Analysis" only has to wait for whatever is still in flight
+    news_urls = [item.get('url') for item in news_items if item.get('url')]
+    if st.session_state.get("speculative_urls") != news_urls:
+        scrape_queue.prefetch(news_urls)
+        st.session_state.speculative_urls = news_urls
+
     # Data Freshness Table
     st.markdown("### 📊 Data Freshness")
+    news_age = st.session_state.get("news_age", 0)
+    if news_age >= 60:
+        st.caption(f"🕒 Served from the news cache, fetched {int(news_age // 60)} min ago.")
     try:
         freshness_data = []
         for item in news_items:
@@ -57,6 +82,9 @@ def render_news_feed():
                 "Source": item.get('source'),
                 "Date": item.get('date'),
                 "Headline": item.get('headline'),
+                "Copies": 1 + len(item.get('duplicates', [])),
+                "Tone": item.get('tone'),
+                "Relevance": item.get('relevance'),
                 "Link": item.get('url') # Add URL for the link column
             })
         
@@ -67,6 +95,9 @@ def render_news_feed():
                 hide_index=True,
                 use_container_width=True,
                 column_config={
+                    "Relevance": st.column_config.ProgressColumn(
+                        "Relevance", min_value=0.0, max_value=1.0, format="%.2f"
+                    ),
                     "Link": st.column_config.LinkColumn(
                         "Article Link",
                         display_text="Read Article"
@@ -91,6 +122,14 @@ def render_news_feed():
                     st.markdown(f"### {item['headline']}")
                     st.markdown(f"**Source:** {item['source']} | **Date:** {item['date']}")
                     st.caption(f"{item['snippet']}")
+                    if "relevance" in item:
+                        st.caption(f"Tone: {item['tone']} ({item['polarity']:+.2f}) · Relevance: {item['relevance']:.2f}")
+                    
+                    # Syndicated copies collapsed into this card
+                    duplicates = item.get('duplicates', [])
+                    if duplicates:
+                        other_sources = ", ".join(sorted({d.get('source') or "Unknown" for d in duplicates}))
+                        st.caption(f"🔁 Also reported by {len(duplicates)} other source(s): {other_sources}")
                     
                 with col_check:
                     # Checkbox for selection
@@ -111,6 +150,8 @@ def render_news_feed():
                 st.error("Please select at least one article.")
             else:
                 selected_articles = [news_items[i] for i in selected_indices]
+                # Drop queued background downloads for articles the user unchecked
+                scrape_queue.cancel([item.get('url') for i, item in enumerate(news_items) if i not in selected_indices])
                 st.session_state.selected_articles = selected_articles
                 st.session_state.step = 3 # Move to Analysis
                 st.rerun()
@@ -1,6 +1,34 @@
 import streamlit as st
 import datetime
-from utils import data_handler
+from utils import data_handler, portfolio_analytics
+
+def _pct(value) -> str:
+    return "—" if value is None or value != value else f"{value:+.2f}%"
+
+def render_performance(analytics: dict):
+    """
+    Headline metrics plus sector and recommendation breakdowns of performance
+    since each position was added.
+    """
+    summary = analytics["summary"]
+    st.markdown("### 📈 Performance Since Analysis")
+    if not summary.get("priced"):
+        st.caption("No price history available for the held tickers yet.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Avg Return", _pct(summary["avg_return"]), help=f"{summary['priced']} of {summary['positions']} positions priced")
+    col2.metric("Median Return", _pct(summary["median_return"]))
+    col3.metric("Hit Rate", "—" if summary["hit_rate"] is None else f"{summary['hit_rate']:.0f}%",
+                help="BUY/WATCH calls that went up, SELL/AVOID calls that went down")
+    col4.metric("Worst Drawdown", _pct(summary["worst_drawdown"]))
+
+    tab_sectors, tab_recs = st.tabs(["By Sector", "By Recommendation"])
+    with tab_sectors:
+        st.dataframe(analytics["sectors"], use_container_width=True, hide_index=True)
+    with tab_recs:
+        st.dataframe(analytics["recommendations"], use_container_width=True, hide_index=True)
+    st.markdown("---")
 
 def render_portfolio():
     """
@@ -16,6 +44,10 @@ def render_portfolio():
         st.info("Portfolio is empty or database connection missing. Please check your configuration.")
         return
 
+    analytics = portfolio_analytics.compute_analytics(df)
+    render_performance(analytics)
+    df = analytics["positions"]
+
     # Group by Sector
     sectors = df['Sector'].unique()
     
@@ -27,7 +59,8 @@ def render_portfolio():
         # Using dataframe for density
         st.dataframe(
             sector_df[[
-                "Ticker", "Name", "Recommendation", "Price", 
+                "Ticker", "Name", "Recommendation", "Price", "Current Price", "Change %",
+                "Return %", "Volatility %", "Max Drawdown %",
                 "Date Added", "Short Term Plan", "Long Term Plan"
             ]],
             use_container_width=True,
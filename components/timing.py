@@ -0,0 +1,42 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+def render_timing_sidebar():
+    """
+    Optional sidebar waterfall of the spans recorded during the last analysis
+    (searches, scrapes, Gemini calls, price lookups, database calls).
+    """
+    if not st.sidebar.toggle("Show timing waterfall", key="show_timing"):
+        return
+
+    spans = st.session_state.get("last_trace")
+    if not spans:
+        st.sidebar.caption("Run an analysis to see where the time goes.")
+        return
+
+    df = pd.DataFrame([
+        {
+            "Span": span["name"] + (f" ({span['attributes']['phase']})" if span["attributes"].get("phase") else ""),
+            "Start": span["offset"],
+            "Duration": span["duration"] or 0.0,
+            "Detail": ", ".join(f"{k}={v}" for k, v in span["attributes"].items() if k != "phase"),
+            "Error": span["error"] or ""
+        }
+        for span in spans
+    ])
+    total = (df["Start"] + df["Duration"]).max()
+
+    fig = px.bar(
+        df, x="Duration", y=df.index, base="Start", orientation="h",
+        color="Span", hover_data={"Detail": True, "Error": True, "Start": ":.3f", "Duration": ":.3f"},
+        labels={"y": ""}
+    )
+    fig.update_yaxes(autorange="reversed", showticklabels=False)
+    fig.update_layout(
+        height=max(240, 18 * len(df) + 80), margin=dict(l=0, r=0, t=10, b=0),
+        xaxis_title="seconds", showlegend=True, legend=dict(orientation="h", y=-0.15),
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font_color="#FAFAFA"
+    )
+    st.sidebar.caption(f"Last analysis: {len(df)} spans, {total:.2f}s")
+    st.sidebar.plotly_chart(fig, use_container_width=True)
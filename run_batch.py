@@ -0,0 +1,178 @@
+"""
+Headless batch analysis: search -> scrape -> analyze -> price every topic without the
+Streamlit UI, e.g. for nightly sector reports.
+
+Topics run in a pool of worker processes. Search and Gemini calls are capped across
+all workers with shared semaphores, so adding workers adds scraping and parsing
+throughput without tripping the search backend's rate limit or the Gemini quota.
+Each report is written as JSON to the output directory together with a summary.json.
+
+Usage:
+    python run_batch.py "Semiconductors" "Green Energy" [--workers 4]
+    python run_batch.py --trending --out reports/nightly --save
+    python run_batch.py --topics-file topics.txt --search-limit 2 --llm-limit 3
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("run_batch")
+
+# Defaults for the process-wide limits; the search backend rate-limits aggressively
+BATCH_SEARCH_LIMIT = int(os.environ.get("MARKETPULSE_BATCH_SEARCH_LIMIT", 2))
+BATCH_LLM_LIMIT = int(os.environ.get("MARKETPULSE_BATCH_LLM_LIMIT", 3))
+
+# Set in each worker by _init_worker
+_search_slots = None
+
+def _init_worker(search_slots, llm_slots, log_level: str):
+    global _search_slots
+    _search_slots = search_slots
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s")
+    from streamlit.logger import set_log_level
+    set_log_level("error")  # Streamlit calls outside a running app only log warnings
+    from utils import ai_engine
+    # Each map, reduce or single-prompt request takes a slot, not each analysis
+    ai_engine.set_llm_limiter(llm_slots)
+
+def run_topic(topic: str, max_results: int, mode: str) -> dict:
+    """One topic end to end, in a worker process. Errors are returned, not raised."""
+    from utils import ai_engine, news_scraper
+
+    started = time.monotonic()
+    result = {"topic": topic, "articles": 0, "analysis": None, "error": None}
+    try:
+        with _search_slots:
+            news = news_scraper.get_sector_news(topic, max_results=max_results)
+        result["articles"] = len(news)
+        if not news:
+            result["error"] = "No recent news found"
+            return result
+
+        # Scraping and parsing run freely; only the Gemini requests inside wait for a slot
+        result["analysis"] = ai_engine.analyze_news(news, mode=mode, topic=topic)
+    except Exception as e:
+        logger.exception("Topic %s failed", topic)
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["elapsed"] = round(time.monotonic() - started, 2)
+    return result
+
+def _slug(topic: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-") or "topic"
+
+def save_positions(result: dict, actions) -> int:
+    """Stores the topic's recommendations with one of `actions` in the portfolio table."""
+    from utils import db, data_handler
+    saved = 0
+    for rec in (result["analysis"] or {}).get("recommendations", []):
+        if str(rec.get("action", "")).upper() in actions and db.save_position(data_handler.build_position(rec, result["topic"])):
+            saved += 1
+    return saved
+
+def load_topics(args) -> list:
+    topics = list(args.topics)
+    if args.topics_file:
+        with open(args.topics_file, "r", encoding="utf-8") as f:
+            topics += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if args.trending:
+        from utils.news_scraper import TRENDING_TOPICS
+        topics += TRENDING_TOPICS
+    return list(dict.fromkeys(topics))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics", nargs="*", help="topics (sectors) to analyze")
+    parser.add_argument("--topics-file", help="file with one topic per line")
+    parser.add_argument("--trending", action="store_true", help="also analyze the dashboard's trending topics")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="worker processes")
+    parser.add_argument("--search-limit", type=int, default=BATCH_SEARCH_LIMIT, help="news searches running at once across all workers")
+    parser.add_argument("--llm-limit", type=int, default=BATCH_LLM_LIMIT, help="Gemini requests running at once across all workers")
+    parser.add_argument("--max-results", type=int, default=10, help="articles per topic")
+    parser.add_argument("--mode", choices=["auto", "single", "map_reduce"], default="auto")
+    parser.add_argument("--out", default=os.path.join("reports", datetime.now().strftime("%Y-%m-%d")), help="output directory")
+    parser.add_argument("--save", action="store_true", help="store recommendations in the portfolio database")
+    parser.add_argument("--save-actions", default="BUY", help="comma-separated actions stored by --save")
+    args = parser.parse_args()
+
+    log_level = os.environ.get("MARKETPULSE_LOG_LEVEL", "WARNING").upper()
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    topics = load_topics(args)
+    if not topics:
+        parser.error("no topics given")
+    os.makedirs(args.out, exist_ok=True)
+    actions = {a.strip().upper() for a in args.save_actions.split(",") if a.strip()}
+
+    # Spawned workers start clean instead of inheriting the parent's threads and locks
+    context = multiprocessing.get_context("spawn")
+    started = time.monotonic()
+    results = []
+    with context.Manager() as manager:
+        search_slots = manager.Semaphore(max(1, args.search_limit))
+        llm_slots = manager.Semaphore(max(1, args.llm_limit))
+        with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(topics))), mp_context=context,
+                                 initializer=_init_worker, initargs=(search_slots, llm_slots, log_level)) as pool:
+            futures = [pool.submit(run_topic, topic, args.max_results, args.mode) for topic in topics]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if args.save and result["analysis"]:
+                    result["saved"] = save_positions(result, actions)
+                with open(os.path.join(args.out, f"{_slug(result['topic'])}.json"), "w", encoding="utf-8") as f:
+                    json.dump(result, f, indent=2, default=str)
+                stats = (result["analysis"] or {}).get("run_stats", {})
+                status = f"error: {result['error']}" if result["error"] else (
+                    f"{stats.get('prompt_tokens', 0) + stats.get('output_tokens', 0):,} tokens, "
+                    f"{len(result['analysis'].get('recommendations', []))} recommendations"
+                )
+                print(f"[{len(results)}/{len(topics)}] {result['topic']}: {result['articles']} articles, {result['elapsed']}s, {status}", flush=True)
+    elapsed = time.monotonic() - started
+
+    done = [r for r in results if r["analysis"]]
+    prompt_tokens = sum(r["analysis"].get("run_stats", {}).get("prompt_tokens", 0) for r in done)
+    output_tokens = sum(r["analysis"].get("run_stats", {}).get("output_tokens", 0) for r in done)
+    minutes = max(elapsed, 1e-6) / 60
+    summary = {
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "topics": len(topics),
+        "succeeded": len(done),
+        "failed": {r["topic"]: r["error"] for r in results if r["error"]},
+        "articles": sum(r["articles"] for r in results),
+        "elapsed": round(elapsed, 2),
+        "topics_per_min": round(len(done) / minutes, 2),
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "tokens_per_min": round((prompt_tokens + output_tokens) / minutes),
+        "cached_reports": sum(1 for r in done if r["analysis"].get("cache", {}).get("hit")),
+        "saved_positions": sum(r.get("saved", 0) for r in results),
+        "config": {
+            "workers": args.workers, "search_limit": args.search_limit, "llm_limit": args.llm_limit,
+            "max_results": args.max_results, "mode": args.mode
+        }
+    }
+    with open(os.path.join(args.out, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n{summary['succeeded']}/{summary['topics']} topics in {summary['elapsed']}s "
+          f"({summary['topics_per_min']} topics/min), {summary['articles']} articles")
+    print(f"Tokens: {prompt_tokens:,} in / {output_tokens:,} out ({summary['tokens_per_min']:,} tokens/min), "
+          f"{summary['cached_reports']} report(s) reused from cache")
+    if args.save:
+        print(f"Saved {summary['saved_positions']} position(s) to the portfolio")
+    print(f"Reports written to {args.out}")
+    return 0 if not summary["failed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 import os
 import json
-import datetime
+import logging
 import time
-import random
+import hashlib
+import contextlib
 import google.generativeai as genai
 import streamlit as st
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 # Mock Data for Fallback
 MOCK_NEWS = [
@@ -101,6 +103,9 @@ MOCK_ANALYSIS = {
 
 def configure_genai():
     """Configures the Gemini API client."""
+    if replay.replaying():
+        return True # Answers come from recorded fixtures
+    
     # Prioritize environment variable
     api_key = os.environ.get("GOOGLE_API_KEY")
     
@@ -118,72 +123,50 @@ def configure_genai():
         return True
     return False
 
-from utils import news_scraper
+from utils import news_scraper, dedup, summarizer, json_stream, replay, tracing, sentiment_lexicon
+from utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
 
 def fetch_news(topic: str) -> List[Dict[str, str]]:
     """
     Fetches news using DuckDuckGo news search.
+    Syndicated copies of the same story are collapsed into one item (see dedup.collapse_articles).
     Returns empty list if search fails or returns no results (no automatic fallback).
     """
-    print(f"Searching for {topic}...")
-    # Use the new get_sector_news function
-    real_news = news_scraper.get_sector_news(topic)
-    
-    if real_news:
-        return real_news
+    logger.info("Searching for %s...", topic)
+    with tracing.span("fetch_news", topic=topic) as span:
+        # Use the new get_sector_news function
+        real_news = news_scraper.get_sector_news(topic)
+        span.set(results=len(real_news))
+        
+        if real_news:
+            return dedup.collapse_articles(real_news)
     
-    print("Search returned no results.")
+    logger.info("Search returned no results.")
     return []
 
-import yfinance as yf
+from utils import quotes, tickers
 
-def analyze_news(selected_news: List[Dict[str, str]]) -> Dict[str, Any]:
-    """
-    Analyzes the selected news using Gemini to produce a structured report.
-    Scrapes the full content of selected articles before sending to LLM.
-    Fetches real-time prices for recommended stocks using yfinance.
-    """
-    if not configure_genai():
-        # If configuration fails, we can either raise an error or return mock data.
-        # The user requested explicit error handling, so let's raise an exception if API key is missing.
-        # However, configure_genai returns False if no key. Let's check key explicitly or let the caller handle it.
-        # But for now, let's stick to the plan: if configure_genai fails, it means no key.
-        raise ValueError("Google API Key not found. Please check your .env file.")
+# Use gemini-2.5-flash as requested
+ANALYSIS_MODEL = 'gemini-2.5-flash'
+# Bump whenever ANALYSIS_PROMPT_TEMPLATE changes so cached reports from the old prompt are not reused
+ANALYSIS_PROMPT_VERSION = "1"
+# Parsed analysis reports are shared across sessions for a few hours (prices are refreshed on every read)
+ANALYSIS_CACHE_TTL = int(os.environ.get("MARKETPULSE_ANALYSIS_CACHE_TTL", 6 * 60 * 60))
+analysis_cache = DiskCache("analysis", ttl=ANALYSIS_CACHE_TTL, max_bytes=50 * 1024 * 1024)
 
-    # Use gemini-2.5-flash as requested
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    
-    # Scrape full text for selected articles
-    articles_content = []
-    for item in selected_news:
-        url = item.get('url')
-        headline = item.get('headline', 'No Headline')
-        source = item.get('source', 'Unknown Source')
-        snippet = item.get('snippet', '')
-        
-        content_block = f"Headline: {headline}\nSource: {source}\nSnippet: {snippet}"
-        
-        if url:
-            print(f"Scraping {url}...")
-            content = news_scraper.scrape_article(url)
-            if content:
-                # Limit content length but ensure we send enough
-                content_block += f"\nFull Content: {content[:10000]}" 
-        
-        articles_content.append(content_block)
+# Parallel quote lookups started while the analysis is still streaming
+PRICE_LOOKUP_WORKERS = 5
+# Companies named in the articles are quoted while Gemini is still working (at most this many)
+PREFETCH_TICKER_LIMIT = 20
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="quote-prefetch")
 
-    news_text = "\n\n---\n\n".join(articles_content)
-    
-    # Log character count
-    print(f"Sending {len(news_text)} characters of context to Gemini...")
-    
-    prompt = f"""
-    Analyze the following financial news articles and provide a detailed market assessment.
-    
-    News Context:
-    {news_text}
-    
-    Output must be a valid JSON object with the following schema:
+# Upper bound on the analysis prompt size in (estimated) tokens, article bodies are compressed to fit
+PROMPT_TOKEN_BUDGET = int(os.environ.get("MARKETPULSE_PROMPT_TOKENS", 12000))
+
+# Output schema shared by the single-prompt analysis and the map-reduce "reduce" step
+ANALYSIS_SCHEMA = """    Output must be a valid JSON object with the following schema:
     {{
         "sentiment": "Positive" | "Negative" | "Neutral",
         "summary": [
@@ -207,124 +190,411 @@ def analyze_news(selected_news: List[Dict[str, str]]) -> Dict[str, Any]:
     }}
     Provide exactly 5 recommendations.
     """
+
+ANALYSIS_PROMPT_TEMPLATE = """
+    Analyze the following financial news articles and provide a detailed market assessment.
     
-    response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+    News Context:
+    {news_text}
     
-    text = response.text
-    # Clean up json markdown if present
-    if text.startswith("```json"):
-        text = text[7:-3]
-    elif text.startswith("```"):
-        text = text[3:-3]
-        
-    analysis_data = json.loads(text)
+""" + ANALYSIS_SCHEMA
+
+# Only the ANALYSIS_TOP_K most relevant articles (local lexicon score of the scraped text) are
+# sent to Gemini, and none scoring below ANALYSIS_MIN_RELEVANCE; 0 disables the top-k cut
+ANALYSIS_TOP_K = int(os.environ.get("MARKETPULSE_ANALYSIS_TOP_K", 10))
+ANALYSIS_MIN_RELEVANCE = float(os.environ.get("MARKETPULSE_ANALYSIS_MIN_RELEVANCE", 0.05))
+ANALYSIS_MIN_ARTICLES = 3
+
+# Map-reduce mode: one small call per article, then one call that merges the digests
+MAP_REDUCE_THRESHOLD = int(os.environ.get("MARKETPULSE_MAP_REDUCE_THRESHOLD", 8))
+MAP_CONCURRENCY = int(os.environ.get("MARKETPULSE_MAP_CONCURRENCY", 4))
+MAP_ARTICLE_TOKENS = 3000
+
+# Optional context manager held around every analysis call to Gemini (see set_llm_limiter)
+_llm_limiter = None
+
+MAP_PROMPT_TEMPLATE = """
+    Read the following financial news article and extract what matters for investors.
     
-    # Post-processing: Fetch Real-Time Prices
-    if "recommendations" in analysis_data:
-        print("Fetching real-time prices...")
-        for rec in analysis_data["recommendations"]:
-            ticker = rec.get("ticker")
-            if ticker:
-                try:
-                    # Use fast_info for latest price
-                    stock = yf.Ticker(ticker)
-                    # fast_info is generally faster than history
-                    # 'last_price' might be available, or 'regularMarketPrice' depending on yfinance version
-                    # Let's try fast_info first, then history
-                    price = None
-                    if hasattr(stock, 'fast_info'):
-                         price = stock.fast_info.get('last_price')
-                    
-                    if price is None:
-                        # Fallback to history
-                        hist = stock.history(period="1d")
-                        if not hist.empty:
-                            price = hist['Close'].iloc[-1]
-                            
-                    if price:
-                        rec["price"] = f"{price:.2f}"
-                        print(f"Updated price for {ticker}: {price:.2f}")
-                    else:
-                        rec["price"] = f"{rec.get('price')} (Approx)"
-                        
-                except Exception as e:
-                    print(f"Could not fetch price for {ticker}: {e}")
-                    rec["price"] = f"{rec.get('price')} (Approx)"
-
-    return analysis_data
+    Article:
+    {article}
+    
+    Output must be a valid JSON object with the following schema:
+    {{
+        "sentiment": "Positive" | "Negative" | "Neutral",
+        "summary": "Two or three sentences on what happened and why it matters to markets.",
+        "tickers": [
+            {{
+                "ticker": "Stock Ticker",
+                "company_name": "Company Name",
+                "stance": "Bullish" | "Bearish" | "Neutral",
+                "evidence": "One sentence from the article supporting the stance."
+            }}
+        ]
+    }}
+    Only list companies the article actually discusses.
+    """
 
-def chat_with_analyst(user_query: str, context_data: Dict[str, Any], chat_history: List[Dict[str, str]]) -> str:
+REDUCE_PROMPT_TEMPLATE = """
+    Below are analyst digests of {count} financial news articles, each with its own sentiment,
+    summary and the companies it discusses. Combine them into one detailed market assessment.
+    
+    Article Digests:
+    {digests}
+    
+""" + ANALYSIS_SCHEMA
+
+def _analysis_cache_key(articles_content: List[str], mode: str = "single") -> str:
     """
-    Generates a response to a user's question based on the analysis context and chat history.
-    Includes retry logic and enhanced prompt engineering.
+    Hash of the normalized article blocks (whitespace/case folded, order-independent),
+    the prompt template version, the model name and the analysis mode.
+    """
+    blocks = sorted(" ".join(block.lower().split()) for block in articles_content)
+    payload = json.dumps([ANALYSIS_PROMPT_VERSION, ANALYSIS_MODEL, mode, blocks])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _usage(response) -> Dict[str, int]:
+    """Prompt/output token counts reported by Gemini (zeros if the response has no usage data)."""
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0
+    }
+
+def set_llm_limiter(limiter):
+    """
+    Holds `limiter` (e.g. a semaphore shared between processes) around every map, reduce
+    and single-prompt call, so a cap counts Gemini requests rather than analyses.
+    None removes it.
     """
-    print(f"Chat Request: {user_query}")
+    global _llm_limiter
+    _llm_limiter = limiter
+
+def _llm_slot():
+    return _llm_limiter if _llm_limiter is not None else contextlib.nullcontext()
+
+def _map_article(model, article_block: str) -> Dict[str, Any]:
+    """Map step: digests one article into sentiment, summary and tickers."""
+    prompt = MAP_PROMPT_TEMPLATE.format(article=article_block)
+    with _llm_slot(), tracing.span("generate_content", phase="map", chars=len(prompt)) as span:
+        response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+        usage = _usage(response)
+        span.set(**usage)
+    parser = json_stream.IncrementalJSONParser()
+    parser.feed(response.text)
+    return {"digest": parser.result(), **usage}
+
+def _build_reduce_prompt(model, articles_content: List[str], sources: List[str], stats: Dict[str, Any]) -> str:
+    """
+    Runs the map step for every article (at most MAP_CONCURRENCY calls at once) and builds
+    the reduce prompt from the digests. Articles whose map call fails fall back to their
+    own text, so one bad call doesn't sink the whole report.
+    """
+    digests = [None] * len(articles_content)
+    with ThreadPoolExecutor(max_workers=max(1, min(MAP_CONCURRENCY, len(articles_content))), thread_name_prefix="map") as executor:
+        futures = {executor.submit(tracing.wrap(_map_article), model, block): i for i, block in enumerate(articles_content)}
+        for future, i in futures.items():
+            try:
+                mapped = future.result()
+                digests[i] = json.dumps(mapped["digest"])
+                stats["prompt_tokens"] += mapped["prompt_tokens"]
+                stats["output_tokens"] += mapped["output_tokens"]
+            except Exception as e:
+                logger.warning("Map step failed for article %d: %s", i + 1, e)
+                digests[i] = articles_content[i]
+            stats["llm_calls"] += 1
+    
+    numbered = "\n\n".join(f"Article {i + 1} ({source}):\n{digest}" for i, (source, digest) in enumerate(zip(sources, digests)))
+    return REDUCE_PROMPT_TEMPLATE.format(count=len(digests), digests=numbered)
+
+def _apply_quote(rec: Dict[str, Any], quote: Optional[Dict[str, Any]]):
+    """Writes a live quote into a recommendation, or marks its LLM estimate as approximate."""
+    if quote and quote["price"]:
+        rec["price"] = f"{quote['price']:.2f}"
+        rec["price_as_of"] = quote["as_of"]
+        logger.debug("Updated price for %s: %.2f", rec['ticker'], quote['price'])
+    elif rec.get("ticker"):
+        rec["price"] = f"{rec.get('price')} (Approx)"
+
+def _verify_ticker(rec: Dict[str, Any]) -> Optional[str]:
+    """
+    Checks a recommendation's ticker against the symbol table before it is quoted (in place):
+    a symbol corrected from the company name replaces the LLM's, which is kept as `llm_ticker`.
+    Returns the symbol to quote, or None when it is not a plausible symbol at all.
+    """
+    symbol, listed = tickers.resolve(rec.get("ticker"), rec.get("company_name"))
+    rec["ticker_verified"] = listed
+    if symbol and rec.get("ticker") != symbol:
+        rec["llm_ticker"] = rec.get("ticker")
+        rec["ticker"] = symbol
+    return symbol
+
+def _quote_for(rec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    ticker = _verify_ticker(rec)
+    return quotes.get_quotes([ticker]).get(ticker) if ticker else None
+
+def _prefetch_quotes(articles_content: List[str]):
+    """Starts quoting the companies the articles mention, so recommendations find them cached."""
+    mentioned = tickers.find_tickers("\n".join(articles_content))[:PREFETCH_TICKER_LIMIT]
+    if mentioned:
+        logger.info("Prefetching quotes for %d tickers named in the articles...", len(mentioned))
+        _prefetch_executor.submit(tracing.wrap(quotes.get_quotes), mentioned)
+
+def _enrich_prices(analysis_data: Dict[str, Any]):
+    """
+    Replaces the LLM's estimated prices with real-time prices (in place).
+    All recommended tickers are quoted in one batched request via the shared quote cache.
+    """
+    recs = analysis_data.get("recommendations", [])
+    symbols = [_verify_ticker(rec) for rec in recs]
+    if not any(symbols):
+        for rec in recs:
+            _apply_quote(rec, None)
+        return
+    
+    logger.info("Fetching real-time prices...")
+    live_quotes = quotes.get_quotes([s for s in symbols if s])
+    for rec, symbol in zip(recs, symbols):
+        _apply_quote(rec, live_quotes.get(symbol) if symbol else None)
+
+def _article_header(item: Dict[str, str]) -> str:
+    headline = item.get('headline', 'No Headline')
+    source = item.get('source', 'Unknown Source')
+    snippet = item.get('snippet', '')
+    return f"Headline: {headline}\nSource: {source}\nSnippet: {snippet}"
+
+def _prepare_analysis(selected_news: List[Dict[str, str]], mode: str = "auto",
+                      top_k: int = ANALYSIS_TOP_K,
+                      scrape_report: Optional[Dict[str, Any]] = None,
+                      topic: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Scrapes, de-duplicates, ranks and compresses the selected articles into the analysis prompt.
+    Returns the resolved mode, the prompt (single mode) or per-article blocks (map-reduce),
+    the cache key and the report metadata shown alongside the analysis.
+    """
+    # Scrape full text for all selected articles in parallel, unless the caller already did
+    if scrape_report is None:
+        urls = [item.get('url') for item in selected_news if item.get('url')]
+        logger.info("Scraping %d articles...", len(urls))
+        scrape_report = news_scraper.scrape_articles(urls)
+    scraped = scrape_report["content"]
+    
+    # Drop copies whose scraped bodies turn out to be the same story
+    selected_count = len(selected_news)
+    selected_news = dedup.collapse_articles(selected_news, bodies=scraped)
+    
+    # Keep only the most informative articles. Scored like the news feed (headline and
+    # snippet, same topic) so the ranking matches what the user saw, and so full bodies
+    # and snippet-only articles (failed scrapes) are compared on equal footing
+    deduped_news = sentiment_lexicon.score_news([dict(item) for item in selected_news], topic)
+    selected_news = sentiment_lexicon.select_top(
+        deduped_news, top_k, min_relevance=ANALYSIS_MIN_RELEVANCE, min_keep=ANALYSIS_MIN_ARTICLES
+    )
+    kept = {id(item) for item in selected_news}
+    pruned = [
+        {"headline": item.get("headline"), "relevance": item.get("relevance")}
+        for item in deduped_news if id(item) not in kept
+    ]
+    
+    if mode == "auto":
+        mode = "map_reduce" if len(selected_news) > MAP_REDUCE_THRESHOLD else "single"
+    
+    headers = [_article_header(item) for item in selected_news]
+    bodies = {item['url']: scraped[item['url']] for item in selected_news if scraped.get(item.get('url'))}
+    if mode == "map_reduce":
+        # Each article goes to its own map call, so each gets its own budget
+        budget = MAP_ARTICLE_TOKENS
+        compressed, compression_stats = {}, []
+        for url, body in bodies.items():
+            article_compressed, article_stats = summarizer.compress_articles({url: body}, budget)
+            compressed.update(article_compressed)
+            compression_stats += article_stats
+    else:
+        # Compress scraped bodies so the whole prompt fits the token budget
+        budget = PROMPT_TOKEN_BUDGET
+        overhead = summarizer.estimate_tokens(ANALYSIS_PROMPT_TEMPLATE) + sum(summarizer.estimate_tokens(h) + 8 for h in headers) # + separators/labels
+        compressed, compression_stats = summarizer.compress_articles(bodies, budget - overhead)
+    
+    articles_content = []
+    for item, content_block in zip(selected_news, headers):
+        content = compressed.get(item.get('url'))
+        if content:
+            content_block += f"\nFull Content: {content}"
+        articles_content.append(content_block)
+
+    if mode == "map_reduce":
+        prompt = None
+        prompt_tokens = sum(summarizer.estimate_tokens(MAP_PROMPT_TEMPLATE) + summarizer.estimate_tokens(block) for block in articles_content)
+        logger.info("Sending %d articles to Gemini in map-reduce mode...", len(articles_content))
+    else:
+        news_text = "\n\n---\n\n".join(articles_content)
+        
+        # Log character count
+        logger.info("Sending %d characters of context to Gemini...", len(news_text))
+        
+        prompt = ANALYSIS_PROMPT_TEMPLATE.format(news_text=news_text)
+        prompt_tokens = summarizer.estimate_tokens(prompt)
+    headlines = {item.get('url'): item.get('headline') for item in selected_news}
+    
+    return {
+        "mode": mode,
+        "prompt": prompt,
+        "articles": articles_content,
+        "sources": [item.get('source', 'Unknown Source') for item in selected_news],
+        "cache_key": _analysis_cache_key(articles_content, mode),
+        "report": {
+            # Keep a record of articles that only contributed their snippet
+            "scrape_report": {
+                "timed_out": scrape_report["timed_out"],
+                "failed": scrape_report["failed"],
+                "elapsed": round(scrape_report["elapsed"], 2)
+            },
+            "duplicates_collapsed": selected_count - len(deduped_news),
+            "pruned": pruned,
+            "compression": {
+                "budget_tokens": budget,
+                "prompt_tokens": prompt_tokens,
+                "articles": [
+                    {"headline": headlines.get(stat["key"]), **{k: v for k, v in stat.items() if k != "key"}}
+                    for stat in compression_stats
+                ]
+            }
+        }
+    }
+
+def analyze_news_stream(selected_news: List[Dict[str, str]], mode: str = "auto",
+                        use_cache: bool = True, top_k: int = ANALYSIS_TOP_K,
+                        scrape_report: Optional[Dict[str, Any]] = None,
+                        topic: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of analyze_news. Yields events as the report is generated:
+        {"type": "sentiment", "value": str}
+        {"type": "summary", "value": [str, ...]}
+        {"type": "recommendation", "index": int, "value": dict}  (with its live price)
+        {"type": "done", "result": dict}  (the same report analyze_news returns)
+    The price lookup for each recommendation starts as soon as that recommendation has
+    been generated, so quotes overlap with generation of the remaining ones.
     
+    `mode` is "single" (one prompt with every article), "map_reduce" (one small call per
+    article, then a reduce call that streams the report) or "auto", which picks map-reduce
+    for selections larger than MAP_REDUCE_THRESHOLD. Only the `top_k` most relevant
+    articles by local lexicon score are analyzed (0 keeps every article).
+    `scrape_report` (scrape_articles' result) supplies bodies that were already downloaded;
+    `topic` is the search topic the relevance scores are measured against.
+    """
+    started = time.monotonic()
     if not configure_genai():
-        return "⚠️ Error: API Key not found. Please check your configuration."
+        # If configuration fails, we can either raise an error or return mock data.
+        # The user requested explicit error handling, so let's raise an exception if API key is missing.
+        # However, configure_genai returns False if no key. Let's check key explicitly or let the caller handle it.
+        # But for now, let's stick to the plan: if configure_genai fails, it means no key.
+        raise ValueError("Google API Key not found. Please check your .env file.")
 
-    # Retry configuration
-    max_retries = 3
-    base_delay = 1
+    with tracing.span("prepare_prompt", articles=len(selected_news)) as span:
+        prepared = _prepare_analysis(selected_news, mode, top_k, scrape_report, topic)
+        span.set(mode=prepared["mode"], prompt_tokens=prepared["report"]["compression"]["prompt_tokens"])
+    run_stats = {"mode": prepared["mode"], "llm_calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+    
+    # Identical article sets analyzed recently (by any session) reuse the stored report
+    cached = analysis_cache.get(prepared["cache_key"]) if use_cache else None
+    if cached:
+        analysis_data = cached["analysis"]
+        cache_info = {"hit": True, "age": round(time.time() - cached["created_at"])}
+        logger.info("Reusing cached analysis (%ss old)...", cache_info['age'])
+        _enrich_prices(analysis_data)
+        yield {"type": "sentiment", "value": analysis_data.get("sentiment")}
+        yield {"type": "summary", "value": analysis_data.get("summary", [])}
+        for i, rec in enumerate(analysis_data.get("recommendations", [])):
+            yield {"type": "recommendation", "index": i, "value": rec}
+    else:
+        _prefetch_quotes(prepared["articles"])
+        model = replay.generative_model(ANALYSIS_MODEL)
+        prompt = prepared["prompt"]
+        if prepared["mode"] == "map_reduce":
+            prompt = _build_reduce_prompt(model, prepared["articles"], prepared["sources"], run_stats)
+        parser = json_stream.IncrementalJSONParser(stream_arrays=["recommendations"])
+        # Recommendations waiting on their price lookup, emitted in order as quotes arrive
+        pending = []
+        priced_recs = []
+        quote_for = tracing.wrap(_quote_for)
+        with _llm_slot(), \
+                tracing.span("generate_content", phase="reduce" if prepared["mode"] == "map_reduce" else "analysis",
+                             chars=len(prompt)) as span, \
+                ThreadPoolExecutor(max_workers=PRICE_LOOKUP_WORKERS, thread_name_prefix="quote") as executor:
+            response = model.generate_content(
+                prompt,
+                generation_config={"response_mime_type": "application/json"},
+                stream=True
+            )
+            for chunk in response:
+                for kind, key, value in parser.feed(replay.chunk_text(chunk)):
+                    if kind == "item" and key == "recommendations" and isinstance(value, dict):
+                        priced_recs.append(value)
+                        pending.append((len(priced_recs) - 1, value, executor.submit(quote_for, value)))
+                    elif kind == "field" and key in ("sentiment", "summary"):
+                        yield {"type": key, "value": value}
+                while pending and pending[0][2].done():
+                    index, rec, future = pending.pop(0)
+                    _apply_quote(rec, future.result())
+                    yield {"type": "recommendation", "index": index, "value": rec}
+            usage = _usage(response)
+            span.set(**usage)
+            for index, rec, future in pending:
+                _apply_quote(rec, future.result())
+                yield {"type": "recommendation", "index": index, "value": rec}
+        
 
-    for attempt in range(max_retries):
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            
-            # Construct Context String
-            summary_text = "\n".join(context_data.get("summary", [])) if isinstance(context_data.get("summary"), list) else context_data.get("summary", "")
-            
-            recs_text = ""
-            for rec in context_data.get("recommendations", []):
-                recs_text += f"- {rec.get('ticker')}: {rec.get('action')} at {rec.get('price')}. Reasoning: {rec.get('reasoning')}\n"
-                
-            # Enhanced System Prompt
-            system_prompt = f"""
-            You are a Senior Financial Analyst assisting a user with market research.
-            
-            ### INSTRUCTIONS
-            1. Use the provided 'MARKET ANALYSIS CONTEXT' (Executive Summary and Recommendations) as your primary ground truth.
-            2. If the user asks for definitions, broader market concepts, or general financial advice, use your internal knowledge to expand on the answer.
-            3. If the user asks about a stock NOT in the context, clearly state that it was not part of the current analysis, but provide general known info about it.
-            4. Be professional, concise, and data-driven.
-            
-            ### MARKET ANALYSIS CONTEXT
-            **Executive Summary:**
-            {summary_text}
-            
-            **Stock Recommendations:**
-            {recs_text}
-            """
-            
-            # Construct Chat History
-            history_prompt = "### CONVERSATION HISTORY\n"
-            for msg in chat_history[-5:]: # Keep last 5 messages
-                role = "User" if msg["role"] == "user" else "Analyst"
-                history_prompt += f"{role}: {msg['content']}\n"
-                
-            final_prompt = f"""
-            {system_prompt}
-            
-            {history_prompt}
-            
-            ### USER QUERY
-            User: {user_query}
-            Analyst:
-            """
-            
-            response = model.generate_content(final_prompt)
-            answer = response.text.strip()
-            
-            print(f"Chat Response Length: {len(answer)}")
-            return answer
-
-        except Exception as e:
-            print(f"Chat Error (Attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                sleep_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                print(f"Retrying in {sleep_time:.2f} seconds...")
-                time.sleep(sleep_time)
-            else:
-                return "⚠️ I encountered an error while processing your request. Please try again later."
+        run_stats["llm_calls"] += 1
+        run_stats["prompt_tokens"] += usage["prompt_tokens"]
+        run_stats["output_tokens"] += usage["output_tokens"]
+        
+        analysis_data = parser.result()
+        # Store the raw LLM output; prices are always refreshed on the way out
+        analysis_cache.set(prepared["cache_key"], {"analysis": analysis_data, "created_at": time.time()})
+        cache_info = {"hit": False, "age": 0}
+        # Reuse the recommendations priced during the stream
+        if len(priced_recs) == len(analysis_data.get("recommendations", [])):
+            analysis_data["recommendations"] = priced_recs
+        else:
+            _enrich_prices(analysis_data)
     
-    return "⚠️ Service unavailable after multiple attempts."
+    run_stats["wall_clock"] = round(time.monotonic() - started, 2)
+    analysis_data["cache"] = cache_info
+    analysis_data["run_stats"] = run_stats
+    analysis_data.update(prepared["report"])
+    yield {"type": "done", "result": analysis_data}
+
+def analyze_news(selected_news: List[Dict[str, str]], mode: str = "auto", use_cache: bool = True,
+                 top_k: int = ANALYSIS_TOP_K, topic: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyzes the selected news using Gemini to produce a structured report.
+    Scrapes the full content of selected articles before sending to LLM, keeps the `top_k`
+    most relevant ones and compresses the bodies extractively so the prompt stays within
+    PROMPT_TOKEN_BUDGET.
+    Fetches real-time prices for recommended stocks using yfinance.
+    """
+    result = {}
+    for event in analyze_news_stream(selected_news, mode, use_cache, top_k, topic=topic):
+        if event["type"] == "done":
+            result = event["result"]
+    return result
+
+def _session_for(user_query: str, context_data: Dict[str, Any], chat_history: List[Dict[str, str]]):
+    """One-off chat session seeded with the given history (minus the query itself, if already appended)."""
+    from utils.chat_session import AnalystChatSession
+    history = list(chat_history or [])
+    if history and history[-1]["role"] == "user" and history[-1]["content"] == user_query:
+        history.pop()
+    return AnalystChatSession(context_data, history)
+
+def chat_with_analyst(user_query: str, context_data: Dict[str, Any], chat_history: List[Dict[str, str]]) -> str:
+    """
+    Generates a response to a user's question based on the analysis context and chat history.
+    Stateless wrapper around AnalystChatSession; the Streamlit page keeps a session per
+    analysis instead, so the model and context are reused across turns.
+    """
+    return _session_for(user_query, context_data, chat_history).ask(user_query)
+
+def chat_with_analyst_stream(user_query: str, context_data: Dict[str, Any], chat_history: List[Dict[str, str]]) -> Iterator[str]:
+    """Streaming variant of chat_with_analyst (see AnalystChatSession.ask_stream)."""
+    return _session_for(user_query, context_data, chat_history).ask_stream(user_query)
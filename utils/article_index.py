@@ -0,0 +1,163 @@
+import os
+import logging
+import re
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+from utils.disk_cache import CACHE_DIR
+from utils.date_parser import parse_news_date
+from utils.http_client import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Local full-text store of every article we have fetched or scraped
+INDEX_PATH = os.path.join(CACHE_DIR, "article_index.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    key TEXT PRIMARY KEY,          -- normalized URL
+    url TEXT NOT NULL,
+    headline TEXT,
+    source TEXT,
+    date TEXT,                     -- date string as returned by the search backend
+    published_at REAL,             -- parsed UTC timestamp, for date filters
+    snippet TEXT,
+    body TEXT,
+    topic TEXT,
+    ingested_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    headline, snippet, body,
+    content='articles', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, headline, snippet, body) VALUES (new.rowid, new.headline, new.snippet, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, snippet, body) VALUES ('delete', old.rowid, old.headline, old.snippet, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, snippet, body) VALUES ('delete', old.rowid, old.headline, old.snippet, old.body);
+    INSERT INTO articles_fts (rowid, headline, snippet, body) VALUES (new.rowid, new.headline, new.snippet, new.body);
+END;
+"""
+
+# bm25 column weights: a match in the headline counts more than one in the body
+_BM25_WEIGHTS = (5.0, 2.0, 1.0)
+_QUERY_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+def index_news(items: List[Dict[str, str]], topic: Optional[str] = None):
+    """
+    Upserts search results (headline/source/date/url/snippet) into the index.
+    Bodies already stored for a URL are kept.
+    """
+    now = time.time()
+    rows = []
+    for item in items:
+        url = item.get("url")
+        if not url:
+            continue
+        published = parse_news_date(item.get("date"))
+        rows.append((
+            normalize_url(url), url, item.get("headline"), item.get("source"), item.get("date"),
+            published.timestamp() if published else None, item.get("snippet"), topic, now
+        ))
+    if not rows:
+        return
+    try:
+        with _connect() as conn:
+            conn.executemany("""
+                INSERT INTO articles (key, url, headline, source, date, published_at, snippet, topic, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    headline = excluded.headline, source = excluded.source, date = excluded.date,
+                    published_at = COALESCE(excluded.published_at, articles.published_at),
+                    snippet = excluded.snippet, topic = COALESCE(excluded.topic, articles.topic)
+            """, rows)
+    except sqlite3.Error as e:
+        logger.warning("Article index write error: %s", e)
+
+def index_body(url: str, text: str):
+    """Stores the scraped body for a URL, creating a bare entry if the URL wasn't indexed yet."""
+    if not url or not text:
+        return
+    try:
+        with _connect() as conn:
+            conn.execute("""
+                INSERT INTO articles (key, url, body, ingested_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET body = excluded.body
+                WHERE articles.body IS NOT excluded.body
+            """, (normalize_url(url), url, text, time.time()))
+    except sqlite3.Error as e:
+        logger.warning("Article index write error: %s", e)
+
+def _fts_query(query: str) -> str:
+    """Turns free text into an FTS5 query: every word must match, as a prefix."""
+    tokens = _QUERY_TOKEN_RE.findall(query or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def search(query: str, since_days: Optional[float] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Ranked (bm25) full-text search over indexed headlines, snippets and bodies.
+    Returns news items in the same shape as get_sector_news, plus "score" and "has_body".
+    `since_days` keeps only articles published within that many days.
+    """
+    fts_query = _fts_query(query)
+    if not fts_query:
+        return []
+
+    sql = f"""
+        SELECT a.url, a.headline, a.source, a.date, a.snippet, a.body IS NOT NULL AS has_body,
+               bm25(articles_fts, {", ".join(map(str, _BM25_WEIGHTS))}) AS score
+        FROM articles_fts
+        JOIN articles a ON a.rowid = articles_fts.rowid
+        WHERE articles_fts MATCH ?
+    """
+    params: List[Any] = [fts_query]
+    if since_days is not None:
+        sql += " AND a.published_at >= ?"
+        params.append(time.time() - since_days * 86400)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    try:
+        rows = _connect().execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logger.warning("Article index search error: %s", e)
+        return []
+
+    return [
+        {
+            "headline": row["headline"] or row["url"],
+            "source": row["source"] or "Unknown Source",
+            "date": row["date"] or "",
+            "url": row["url"],
+            "snippet": row["snippet"] or "",
+            "has_body": bool(row["has_body"]),
+            "score": round(-row["score"], 3)  # bm25 is lower-is-better; flip for display
+        }
+        for row in rows
+    ]
+
+def stats() -> Dict[str, int]:
+    try:
+        articles, bodies = _connect().execute("SELECT COUNT(*), COUNT(body) FROM articles").fetchone()
+    except sqlite3.Error:
+        articles, bodies = 0, 0
+    return {"articles": articles, "bodies": bodies}
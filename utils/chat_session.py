@@ -0,0 +1,232 @@
+import time
+import random
+import logging
+import threading
+from typing import List, Dict, Any, Iterator, Optional
+from utils import ai_engine, replay, summarizer, tracing
+
+logger = logging.getLogger(__name__)
+
+# Messages (user + analyst) kept verbatim in every prompt; older ones are folded into the memory
+CHAT_RECENT_MESSAGES = 6
+# Older messages are folded in once this many have piled up beyond the recent window
+CHAT_COMPACT_BATCH = 6
+# Rough size cap of the running memory, in words
+CHAT_MEMORY_WORDS = 150
+
+CHAT_INSTRUCTIONS = """
+    You are a Senior Financial Analyst assisting a user with market research.
+
+    ### INSTRUCTIONS
+    1. Use the provided 'MARKET ANALYSIS CONTEXT' (Executive Summary and Recommendations) as your primary ground truth.
+    2. If the user asks for definitions, broader market concepts, or general financial advice, use your internal knowledge to expand on the answer.
+    3. If the user asks about a stock NOT in the context, clearly state that it was not part of the current analysis, but provide general known info about it.
+    4. Be professional, concise, and data-driven.
+
+    ### MARKET ANALYSIS CONTEXT
+    **Executive Summary:**
+    {summary_text}
+
+    **Stock Recommendations:**
+    {recs_text}
+    """
+
+MEMORY_PROMPT_TEMPLATE = """
+    You maintain the running memory of a conversation between a user and a financial analyst.
+    Merge the new turns into the current memory. Keep tickers, numbers, conclusions, the user's
+    stated preferences and open questions; drop pleasantries. Reply with the updated memory only,
+    at most {max_words} words.
+
+    Current memory:
+    {memory}
+
+    New turns:
+    {turns}
+    """
+
+def _format_turns(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(
+        f"{'User' if msg['role'] == 'user' else 'Analyst'}: {msg['content']}" for msg in messages
+    )
+
+def build_system_instruction(context_data: Dict[str, Any]) -> str:
+    """Static analyst instructions plus the analysis the conversation is about."""
+    summary_text = "\n".join(context_data.get("summary", [])) if isinstance(context_data.get("summary"), list) else context_data.get("summary", "")
+
+    recs_text = ""
+    for rec in context_data.get("recommendations", []):
+        recs_text += f"- {rec.get('ticker')}: {rec.get('action')} at {rec.get('price')}. Reasoning: {rec.get('reasoning')}\n"
+
+    return CHAT_INSTRUCTIONS.format(summary_text=summary_text, recs_text=recs_text)
+
+class AnalystChatSession:
+    """
+    Follow-up chat about one analysis report.
+
+    The analysis context is serialized once into the model's system instruction and the
+    model is reused for every turn. Each prompt carries only a compact running memory of
+    older turns, the last CHAT_RECENT_MESSAGES messages (plus up to CHAT_COMPACT_BATCH older
+    ones not yet summarized) and the new question, so its size stays flat however long the
+    conversation gets. Older messages are summarized into the memory in the background, a
+    batch at a time; questions never wait for it.
+    """
+
+    def __init__(self, context_data: Dict[str, Any], history: Optional[List[Dict[str, str]]] = None):
+        self.context_data = context_data
+        self.memory = ""
+        self.recent: List[Dict[str, str]] = []
+        self.last_prompt_tokens = 0
+        self._model = None
+        self._memory_model = None
+        self._compaction: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        for msg in history or []:
+            self.recent.append({"role": msg["role"], "content": msg["content"]})
+        # A long restored history is summarized in the background
+        self._schedule_compaction()
+
+    def _get_model(self):
+        if self._model is None:
+            self._model = replay.generative_model(
+                ai_engine.ANALYSIS_MODEL,
+                system_instruction=build_system_instruction(self.context_data)
+            )
+        return self._model
+
+    def _build_prompt(self, user_query: str) -> str:
+        # Messages a running compaction is summarizing are still in `recent` until it finishes
+        with self._lock:
+            memory, recent = self.memory, list(self.recent)
+        sections = []
+        if memory:
+            sections.append(f"### CONVERSATION MEMORY\n{memory}")
+        if recent:
+            sections.append(f"### RECENT CONVERSATION\n{_format_turns(recent)}")
+        sections.append(f"### USER QUERY\nUser: {user_query}\nAnalyst:")
+        prompt = "\n\n".join(sections)
+        self.last_prompt_tokens = summarizer.estimate_tokens(prompt)
+        return prompt
+
+    def _compact(self):
+        """Folds the messages that fell out of the recent window into the running memory."""
+        with self._lock:
+            overflow = self.recent[:-CHAT_RECENT_MESSAGES]
+            memory = self.memory
+        if not overflow:
+            return
+        # May run before the first question has configured the client (restored history)
+        if not ai_engine.configure_genai():
+            logger.warning("Chat memory compaction skipped: API key not found")
+            return
+        try:
+            if self._memory_model is None:
+                self._memory_model = replay.generative_model(ai_engine.ANALYSIS_MODEL)
+            prompt = MEMORY_PROMPT_TEMPLATE.format(
+                max_words=CHAT_MEMORY_WORDS, memory=memory or "(empty)", turns=_format_turns(overflow)
+            )
+            with tracing.span("generate_content", phase="chat_memory", chars=len(prompt)) as span:
+                response = self._memory_model.generate_content(prompt)
+                span.set(**ai_engine._usage(response))
+            memory = response.text.strip()
+        except Exception as e:
+            # Keep the turns verbatim and try again after the next answer
+            logger.warning("Chat memory compaction failed: %s", e)
+            return
+        with self._lock:
+            self.memory = memory
+            # New messages may have been appended meanwhile; only drop the ones summarized
+            self.recent = self.recent[len(overflow):]
+
+    def _schedule_compaction(self):
+        with self._lock:
+            needed = len(self.recent) - CHAT_RECENT_MESSAGES >= CHAT_COMPACT_BATCH
+        if needed and (self._compaction is None or not self._compaction.is_alive()):
+            self._compaction = threading.Thread(target=tracing.wrap(self._compact), name="chat-memory", daemon=True)
+            self._compaction.start()
+
+    def _record(self, user_query: str, answer: str):
+        with self._lock:
+            self.recent.append({"role": "user", "content": user_query})
+            self.recent.append({"role": "assistant", "content": answer})
+        self._schedule_compaction()
+
+    def ask(self, user_query: str) -> str:
+        """Answers a question, with retries. Failed turns are not added to the conversation."""
+        logger.info("Chat Request: %s", user_query)
+
+        if not ai_engine.configure_genai():
+            return "⚠️ Error: API Key not found. Please check your configuration."
+
+        # Retry configuration
+        max_retries = 3
+        base_delay = 1
+        final_prompt = self._build_prompt(user_query)
+
+        for attempt in range(max_retries):
+            try:
+                with tracing.span("generate_content", phase="chat", chars=len(final_prompt)) as span:
+                    response = self._get_model().generate_content(final_prompt)
+                    span.set(**ai_engine._usage(response))
+                answer = response.text.strip()
+
+                logger.info("Chat Response Length: %d (prompt ~%d tokens)", len(answer), self.last_prompt_tokens)
+                self._record(user_query, answer)
+                return answer
+
+            except Exception as e:
+                logger.warning("Chat Error (Attempt %d/%d): %s", attempt + 1, max_retries, e)
+                if attempt < max_retries - 1:
+                    sleep_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.info("Retrying in %.2f seconds...", sleep_time)
+                    time.sleep(sleep_time)
+                else:
+                    return "⚠️ I encountered an error while processing your request. Please try again later."
+
+        return "⚠️ Service unavailable after multiple attempts."
+
+    def ask_stream(self, user_query: str) -> Iterator[str]:
+        """
+        Streaming variant of ask. Failures before the first token are retried; a mid-stream
+        failure ends the answer with a note, and the partial answer is kept in the conversation.
+        """
+        logger.info("Chat Request (stream): %s", user_query)
+
+        if not ai_engine.configure_genai():
+            yield "⚠️ Error: API Key not found. Please check your configuration."
+            return
+
+        # Retry configuration
+        max_retries = 3
+        base_delay = 1
+        final_prompt = self._build_prompt(user_query)
+
+        for attempt in range(max_retries):
+            parts = []
+            try:
+                with tracing.span("generate_content", phase="chat", chars=len(final_prompt)) as span:
+                    response = self._get_model().generate_content(final_prompt, stream=True)
+                    for chunk in response:
+                        text = replay.chunk_text(chunk)
+                        if text:
+                            parts.append(text)
+                            yield text
+                    span.set(**ai_engine._usage(response))
+
+                answer = "".join(parts)
+                logger.info("Chat Response Length: %d (prompt ~%d tokens)", len(answer), self.last_prompt_tokens)
+                self._record(user_query, answer.strip())
+                return
+
+            except Exception as e:
+                logger.warning("Chat Error (Attempt %d/%d): %s", attempt + 1, max_retries, e)
+                if parts:
+                    self._record(user_query, "".join(parts).strip())
+                    yield "\n\n⚠️ The response was interrupted. Please try again."
+                    return
+                if attempt < max_retries - 1:
+                    sleep_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.info("Retrying in %.2f seconds...", sleep_time)
+                    time.sleep(sleep_time)
+                else:
+                    yield "⚠️ I encountered an error while processing your request. Please try again later."
+                    return
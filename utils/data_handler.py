@@ -1,11 +1,11 @@
 import pandas as pd
 import streamlit as st
 import datetime
-from utils import db
+from utils import db, quotes
 
-def add_to_portfolio(stock_data: dict, source_topic: str):
+def build_position(stock_data: dict, source_topic: str) -> dict:
     """
-    Adds a stock to the database portfolio.
+    Converts a recommendation into a portfolio row.
     stock_data expected keys: ticker, company_name, action, price
     """
     # Helper to safely convert price
@@ -29,7 +29,14 @@ def add_to_portfolio(stock_data: dict, source_topic: str):
         "long_term_plan": stock_data.get("long_term_plan", "N/A"),
         # created_at is handled by DB or default
     }
-    
+    return entry
+
+def add_to_portfolio(stock_data: dict, source_topic: str):
+    """
+    Adds a stock to the database portfolio.
+    stock_data expected keys: ticker, company_name, action, price
+    """
+    entry = build_position(stock_data, source_topic)
     success = db.save_position(entry)
     if success:
         st.success(f"Added {entry['ticker']} to Portfolio!")
@@ -46,7 +53,7 @@ def get_portfolio_dataframe() -> pd.DataFrame:
         # Return empty with correct columns
         return pd.DataFrame(columns=[
             "Ticker", "Name", "Sector", "Recommendation", 
-            "Date Added", "Price", "Short Term Plan", "Long Term Plan"
+            "Date Added", "Price", "Current Price", "Change %", "Short Term Plan", "Long Term Plan"
         ])
     
     df = pd.DataFrame(data)
@@ -64,6 +71,11 @@ def get_portfolio_dataframe() -> pd.DataFrame:
         "long_term_plan": "Long Term Plan"
     })
     
+    # Current prices for every held ticker in one batched quote request
+    live_quotes = quotes.get_quotes(df['Ticker'].dropna().unique().tolist())
+    df['Current Price'] = df['Ticker'].map(lambda t: live_quotes.get(str(t).upper(), {}).get("price"))
+    df['Change %'] = ((df['Current Price'] / df['Price'].where(df['Price'] > 0) - 1) * 100).round(2)
+    
     # Format Date
     if 'created_at' in df.columns:
         df['Date Added'] = pd.to_datetime(df['created_at']).dt.strftime("%Y-%m-%d")
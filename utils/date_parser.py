@@ -0,0 +1,111 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import dateutil.parser
+
+# Formats seen from news search backends that datetime.fromisoformat() does not accept
+KNOWN_FORMATS = [
+    "%a, %d %b %Y %H:%M:%S %z",   # RFC 2822: Fri, 05 Dec 2025 14:30:00 +0000
+    "%a, %d %b %Y %H:%M:%S %Z",   # RFC 2822 with zone name: Fri, 05 Dec 2025 14:30:00 GMT
+    "%d %b %Y %H:%M:%S %z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y/%m/%d %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+    "%b %d, %Y",                  # Dec 05, 2025
+    "%B %d, %Y",                  # December 05, 2025
+    "%d %b %Y",
+]
+
+_RELATIVE_RE = re.compile(r"^(\d+)\s+(minute|min|hour|day|week)s?\s+ago$", re.IGNORECASE)
+_RELATIVE_UNITS = {"minute": "minutes", "min": "minutes", "hour": "hours", "day": "days", "week": "weeks"}
+_SHAPE_TABLE = str.maketrans("0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+                             "9" * 10 + "a" * 52)
+
+def _to_utc(value: datetime) -> datetime:
+    """Naive timestamps are taken to be UTC; aware ones are converted to UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+# Layout -> strptime format (or None if no known format fits), filled as layouts are seen
+_shape_formats = {}
+_SHAPE_CACHE_SIZE = 1024
+
+def _parse_known_format(text: str) -> Optional[datetime]:
+    """
+    Parses `text` with the first known format that fits. The winning format is memoized
+    on the string's shape (digits and letters collapsed), so each distinct layout is
+    only probed once and later strings with that layout take a single strptime call.
+    """
+    shape = text.translate(_SHAPE_TABLE)
+    if shape in _shape_formats:
+        fmt = _shape_formats[shape]
+        if fmt is None:
+            return None
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass  # Same shape, different content (e.g. "Sept" vs "Sep"); probe again
+
+    if len(_shape_formats) >= _SHAPE_CACHE_SIZE:
+        _shape_formats.clear()
+    for fmt in KNOWN_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        _shape_formats[shape] = fmt
+        return parsed
+    _shape_formats.setdefault(shape, None)
+    return None
+
+def parse_news_date(value, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Parses a news timestamp into a timezone-aware UTC datetime.
+    Tries, in order: ISO-8601, epoch seconds, a memoized strptime format for the
+    string's layout, "N hours ago" style relative dates and finally dateutil.
+    Returns None if nothing matches.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return _to_utc(value)
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None  # Out of the platform's timestamp range
+
+    text = str(value).strip()
+    if not text:
+        return None
+
+    # Fast path: ISO-8601, which is what the search backend returns
+    try:
+        return _to_utc(datetime.fromisoformat(text))
+    except ValueError:
+        pass
+
+    if text.isdigit():
+        try:
+            return datetime.fromtimestamp(int(text), timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+
+    parsed = _parse_known_format(text)
+    if parsed is not None:
+        return _to_utc(parsed)
+
+    match = _RELATIVE_RE.match(text)
+    if match:
+        amount, unit = int(match.group(1)), _RELATIVE_UNITS[match.group(2).lower()]
+        try:
+            return (now or datetime.now(timezone.utc)) - timedelta(**{unit: amount})
+        except OverflowError:
+            return None
+
+    try:
+        return _to_utc(dateutil.parser.parse(text))
+    except (ValueError, OverflowError):
+        return None
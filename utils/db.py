@@ -1,13 +1,17 @@
 import os
+import logging
 import streamlit as st
 from supabase import create_client, Client
 import datetime
 
 from dotenv import load_dotenv
+from utils import tracing
 
 # Load env vars if not already loaded
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize Supabase Client
 @st.cache_resource
 def init_connection():
@@ -24,13 +28,13 @@ def init_connection():
             pass
             
     if not url or not key:
-        print("❌ Supabase keys not found in environment or secrets.")
+        logger.error("Supabase keys not found in environment or secrets.")
         return None
         
     try:
         return create_client(url, key)
     except Exception as e:
-        print(f"❌ Failed to create Supabase client: {e}")
+        logger.error("Failed to create Supabase client: %s", e)
         return None
 
 def get_client():
@@ -42,7 +46,8 @@ def seed_default_portfolio(client):
     """
     try:
         # Check if empty
-        response = client.table("portfolio").select("id", count="exact").execute()
+        with tracing.span("supabase.count", table="portfolio"):
+            response = client.table("portfolio").select("id", count="exact").execute()
         if response.count == 0:
             default_data = [
                 {
@@ -76,10 +81,11 @@ def seed_default_portfolio(client):
                     "created_at": datetime.datetime.now().isoformat()
                 }
             ]
-            client.table("portfolio").insert(default_data).execute()
+            with tracing.span("supabase.insert", table="portfolio", rows=len(default_data)):
+                client.table("portfolio").insert(default_data).execute()
             return True
     except Exception as e:
-        print(f"Seeding error: {e}")
+        logger.warning("Seeding error: %s", e)
         return False
     return False
 
@@ -95,7 +101,9 @@ def fetch_portfolio():
         # Try to seed if empty (this is a simple check, might want to optimize in prod)
         seed_default_portfolio(client)
         
-        response = client.table("portfolio").select("*").order("created_at", desc=True).execute()
+        with tracing.span("supabase.select", table="portfolio") as span:
+            response = client.table("portfolio").select("*").order("created_at", desc=True).execute()
+            span.set(rows=len(response.data or []))
         return response.data
     except Exception as e:
         st.error(f"Database Error: {e}")
@@ -111,7 +119,8 @@ def save_position(data: dict):
         return False
         
     try:
-        client.table("portfolio").insert(data).execute()
+        with tracing.span("supabase.insert", table="portfolio", rows=1):
+            client.table("portfolio").insert(data).execute()
         return True
     except Exception as e:
         st.error(f"Error saving to DB: {e}")
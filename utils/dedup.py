@@ -0,0 +1,117 @@
+import re
+import zlib
+import logging
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# MinHash signature size and LSH banding (16 bands x 4 rows ~ 0.5 Jaccard detection threshold)
+NUM_PERM = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.5
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1337)  # Fixed seed so signatures are stable across processes
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=(NUM_PERM, 1)).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=(NUM_PERM, 1)).astype(np.uint64)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def _shingles(text: str, k: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hashes the word k-shingles of the text into an array of 31-bit integers."""
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if len(tokens) < k:
+        grams = tokens
+    else:
+        grams = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    hashes = {zlib.crc32(g.encode("utf-8")) & _MERSENNE_PRIME for g in grams}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    Computes a MinHash signature of the text's shingle set.
+    All permutations are evaluated at once as a (NUM_PERM x shingles) matrix.
+    """
+    shingles = _shingles(text)
+    if shingles.size == 0:
+        return np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    return ((_PERM_A * shingles + _PERM_B) % _MERSENNE_PRIME).min(axis=1)
+
+def cluster_duplicates(texts: List[str], threshold: float = DEFAULT_THRESHOLD) -> List[List[int]]:
+    """
+    Groups near-duplicate texts. Candidate pairs come from LSH buckets and are confirmed
+    when their estimated Jaccard similarity reaches `threshold`.
+    Returns clusters of indices, ordered by first appearance.
+    """
+    if not texts:
+        return []
+    signatures = np.vstack([minhash_signature(t) for t in texts])
+    empty = np.array([not _TOKEN_RE.search((t or "").lower()) for t in texts])
+
+    parent = list(range(len(texts)))
+
+    def _find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // LSH_BANDS
+    for band in range(LSH_BANDS):
+        buckets = {}
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            if empty[i]:
+                continue
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            for pos, a in enumerate(members):
+                for b in members[pos + 1:]:
+                    root_a, root_b = _find(a), _find(b)
+                    if root_a == root_b:
+                        continue
+                    if np.mean(signatures[a] == signatures[b]) >= threshold:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(_find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda c: c[0])
+
+def collapse_articles(items: List[Dict[str, Any]],
+                      bodies: Optional[Dict[str, str]] = None,
+                      threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Keeps one representative per cluster of near-duplicate articles.
+    Articles are compared on headline + snippet, plus the scraped body when `bodies`
+    (url -> text) has one. The representative is the copy with the most text, and it
+    lists the collapsed copies under "duplicates" so coverage stays visible.
+    """
+    bodies = bodies or {}
+
+    def _text(item):
+        return " ".join(filter(None, [item.get("headline"), item.get("snippet"), bodies.get(item.get("url"))]))
+
+    texts = [_text(item) for item in items]
+    collapsed = []
+    for cluster in cluster_duplicates(texts, threshold):
+        best = max(cluster, key=lambda i: len(texts[i]))
+        representative = dict(items[best])
+        duplicates = list(representative.get("duplicates", []))
+        for i in cluster:
+            if i == best:
+                continue
+            duplicates.append({
+                "headline": items[i].get("headline"),
+                "source": items[i].get("source"),
+                "url": items[i].get("url")
+            })
+            duplicates.extend(items[i].get("duplicates", []))
+        if duplicates:
+            representative["duplicates"] = duplicates
+        collapsed.append(representative)
+
+    if len(collapsed) < len(items):
+        logger.info("Collapsed %d near-duplicate articles.", len(items) - len(collapsed))
+    return collapsed
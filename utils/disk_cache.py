@@ -0,0 +1,153 @@
+import os
+import json
+import logging
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Shared cache location; every Streamlit session and worker process on the host uses the same files
+CACHE_DIR = os.environ.get(
+    "MARKETPULSE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+)
+
+class DiskCache:
+    """
+    A small persistent key/value cache backed by SQLite.
+    Values are JSON-serialized and zlib-compressed. Entries expire after `ttl` seconds and the
+    least recently used entries are evicted once the stored size exceeds `max_bytes`.
+    Hit/miss counters live in the same file so they are shared across processes.
+    """
+
+    def __init__(self, name: str, ttl: float, max_bytes: int, directory: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory = directory or CACHE_DIR
+        self.path = os.path.join(self.directory, f"{name}.sqlite3")
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, counter: str):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (counter,)
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached value, or None if it is missing or older than the TTL.
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or now - row[1] > self.ttl:
+                self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._bump(conn, "hits")
+            return json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning("Cache read error (%s): %s", self.name, e)
+            return None
+
+    def set(self, key: str, value: Any):
+        """
+        Stores a JSON-serializable value, then drops expired entries and evicts
+        least recently used ones until the cache fits in `max_bytes`.
+        """
+        try:
+            blob = zlib.compress(json.dumps(value).encode("utf-8"))
+            now = time.time()
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), now, now)
+                )
+                conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Cache write error (%s): %s", self.name, e)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        if evicted:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES ('evictions', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (evicted,)
+            )
+
+    def delete(self, key: str):
+        try:
+            self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning("Cache delete error (%s): %s", self.name, e)
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM counters")
+        except sqlite3.Error as e:
+            logger.warning("Cache clear error (%s): %s", self.name, e)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss/eviction counters plus the current entry count and stored size."""
+        try:
+            conn = self._connect()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache stats error (%s): %s", self.name, e)
+            counters, entries, size = {}, 0, 0
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": size
+        }
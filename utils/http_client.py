@@ -0,0 +1,132 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Dict, Any, Optional
+from utils import replay
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes "br" responses when it is installed)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Connection pooling: keep-alive connections kept per host, and how many requests may hit one host at once
+HTTP_POOL_HOSTS = 50
+HTTP_POOL_MAXSIZE = 8
+HTTP_PER_HOST_LIMIT = 4
+HTTP_MAX_BYTES = 5 * 1024 * 1024  # Skip anything larger; it isn't a news article
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+# Query parameters that only track the referrer and never change the page content
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ocid", "cmpid", "ref", "src", "guccounter"}
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits: Dict[str, threading.BoundedSemaphore] = {}
+_host_limits_lock = threading.Lock()
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL used as a cache key: lowercase scheme and host,
+    no default port, fragment or tracking parameters, sorted query and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide pooled session. Connections to the same publisher are
+    kept alive and reused across articles, sessions and worker threads.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_HOSTS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=Retry(total=1, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                                      allowed_methods=["GET"])
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                    "Accept-Encoding": ACCEPT_ENCODING
+                })
+                _session = session
+    return _session
+
+def _host_limit(host: str) -> threading.BoundedSemaphore:
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(HTTP_PER_HOST_LIMIT)
+        return _host_limits[host]
+
+def fetch(url: str, timeout: float = 10,
+          etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+    """
+    GETs a page over the pooled session, at most HTTP_PER_HOST_LIMIT at a time per host.
+    Sends If-None-Match / If-Modified-Since when validators are given.
+    Returns {"status", "html", "etag", "last_modified"} with "html" as raw bytes, or None
+    for 304 Not Modified, errors, non-HTML content and oversized pages.
+    Raises TimeoutError if the host slot can't be obtained within `timeout`.
+    """
+    return replay.fetch_page(url, {"etag": etag, "last_modified": last_modified},
+                             lambda: _fetch(url, timeout, etag, last_modified))
+
+def _fetch(url: str, timeout: float, etag: Optional[str], last_modified: Optional[str]) -> Dict[str, Any]:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    limit = _host_limit(urlsplit(url).netloc.lower())
+    if not limit.acquire(timeout=timeout):
+        raise TimeoutError(f"Too many concurrent requests to {urlsplit(url).netloc}")
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+        try:
+            result = {
+                "status": response.status_code,
+                "html": None,
+                "etag": response.headers.get("ETag") or etag,
+                "last_modified": response.headers.get("Last-Modified") or last_modified
+            }
+            if response.status_code != 200:
+                return result
+
+            content_type = response.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type and "xml" not in content_type:
+                return result
+
+            chunks, size = [], 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > HTTP_MAX_BYTES:
+                    return result
+            result["html"] = b"".join(chunks)  # Raw bytes; trafilatura detects the encoding itself
+            return result
+        finally:
+            response.close()  # Fully read responses hand their connection back to the pool
+    finally:
+        limit.release()
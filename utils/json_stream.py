@@ -0,0 +1,125 @@
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a streamed top-level JSON object.
+
+    Feed it text chunks as they arrive; it reports each top-level field as soon as its
+    value is complete, and each element of the arrays named in `stream_arrays` as soon
+    as that element is complete (before the array itself closes).
+
+    Events are tuples:
+        ("field", key, value)  - a complete top-level value
+        ("item", key, value)   - a complete element of a streamed array
+    """
+
+    def __init__(self, stream_arrays: Iterable[str] = ()):
+        self.stream_arrays = set(stream_arrays)
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "start"      # start | key | colon | value | in_value | comma | done
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._value_is_container = False
+        self._streaming = False     # current top-level value is a streamed array
+        self._item_start = None
+        self._item_is_container = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        """Consumes the next chunk of text and returns the events it completed."""
+        events = []
+        self._text += chunk
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key_string":
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._expect = "colon"
+                continue
+
+            if self._expect == "done" or c in " \t\r\n":
+                continue
+
+            if self._expect == "start":
+                if c == "{":
+                    self._depth = 1
+                    self._expect = "key"
+                continue  # Anything before the opening brace (e.g. a ```json fence) is ignored
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect == "key":
+                    self._key_start = i
+                    self._expect = "key_string"
+                    continue
+            elif c == ":" and self._depth == 1 and self._expect == "colon":
+                self._expect = "value"
+                continue
+
+            # Start of a top-level value or of a streamed array element
+            if self._depth == 1 and self._expect == "value":
+                self._value_start = i
+                self._value_is_container = c in "{["
+                self._streaming = c == "[" and self._key in self.stream_arrays
+                self._expect = "in_value"
+            elif self._depth == 2 and self._streaming and self._item_start is None and c not in ",]":
+                self._item_start = i
+                self._item_is_container = c in "{["
+
+            if self._in_string:
+                continue
+
+            if c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._streaming and self._item_is_container and self._item_start is not None:
+                    events.append(("item", self._key, json.loads(text[self._item_start:i + 1])))
+                    self._item_start = None
+                elif self._depth == 1 and self._expect == "in_value" and self._value_is_container:
+                    if self._streaming and self._item_start is not None:
+                        events.append(("item", self._key, json.loads(text[self._item_start:i].strip())))
+                        self._item_start = None
+                    events.append(("field", self._key, json.loads(text[self._value_start:i + 1])))
+                    self._streaming = False
+                    self._expect = "comma"
+                elif self._depth == 0:
+                    if self._expect == "in_value":
+                        events.append(("field", self._key, json.loads(text[self._value_start:i].strip())))
+                    self._expect = "done"
+            elif c == ",":
+                if self._depth == 1:
+                    if self._expect == "in_value" and not self._value_is_container:
+                        events.append(("field", self._key, json.loads(text[self._value_start:i].strip())))
+                    self._expect = "key"
+                elif self._depth == 2 and self._streaming and self._item_start is not None and not self._item_is_container:
+                    events.append(("item", self._key, json.loads(text[self._item_start:i].strip())))
+                    self._item_start = None
+
+        self._pos = len(text)
+        return events
+
+    @property
+    def complete(self) -> bool:
+        return self._expect == "done"
+
+    def result(self) -> Dict[str, Any]:
+        """Parses the full text received so far (raises ValueError if it isn't valid JSON yet)."""
+        text = self._text
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("No JSON object in response")
+        return json.loads(text[start:end + 1])
@@ -1,70 +1,286 @@
-from duckduckgo_search import DDGS
 import trafilatura
-from typing import List, Dict
-from datetime import datetime, timedelta
-import dateutil.parser
+from typing import List, Dict, Any, Iterator, Optional
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import threading
+import logging
+import time
+from utils.date_parser import parse_news_date
+from utils.disk_cache import DiskCache
+from utils import http_client, article_index, tracing, sentiment_lexicon
+from utils.http_client import normalize_url
+from utils.replay import DDGS
+
+# Sectors offered on the dashboard and refreshed by scheduled jobs
+TRENDING_TOPICS = [
+    "Artificial Intelligence",
+    "Green Energy",
+    "Cryptocurrency",
+    "Biotech",
+    "Semiconductors"
+]
+
+# Articles older than this are discarded
+FRESHNESS_DAYS = 3
+
+# Batch search limits: parallel queries on the shared session and minimum spacing between query starts
+NEWS_BATCH_MAX_CONCURRENCY = 3
+NEWS_BATCH_MIN_INTERVAL = 1.0
+
+# Scraping limits: how many downloads run at once (shared scrape queue workers), how long a
+# single article may take, and how long a batch may take before we give up on the stragglers.
+SCRAPE_MAX_WORKERS = 8
+SCRAPE_URL_TIMEOUT = 10
+SCRAPE_TOTAL_TIMEOUT = 25
+
+# Extracted article text is served without revalidation for a day and kept on disk for a week
+# (for conditional GETs), capped at 200 MB compressed
+ARTICLE_FRESH_TTL = 24 * 60 * 60
+ARTICLE_CACHE_TTL = 7 * 24 * 60 * 60
+ARTICLE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+content_cache = DiskCache("articles", ttl=ARTICLE_CACHE_TTL, max_bytes=ARTICLE_CACHE_MAX_BYTES)
+
+logger = logging.getLogger(__name__)
+
+def _iter_search_news(ddgs: DDGS, topic: str, max_results: int) -> Iterator[Dict[str, str]]:
+    """
+    Runs one news query on an open DDGS session and yields the articles from the last 3 days.
+    duckduckgo_search returns the complete result list from a single call, so the first
+    article is only yielded once the search has finished; the generator lets callers stop
+    early and hand articles on one at a time.
+    Raises on search errors so callers can decide how to report them.
+    """
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=FRESHNESS_DAYS)
+    
+    # Search for news from the last week ('w') to ensure we get enough candidates to filter
+    with tracing.span("news_search", topic=topic) as span:
+        results = ddgs.news(
+            keywords=f"{topic} stock market",
+            region="us-en",
+            timelimit="w", 
+            max_results=max_results * 2 # Fetch more to allow for filtering
+        )
+        span.set(results=len(results))
+    
+    kept = []
+    try:
+        for r in results:
+            if len(kept) >= max_results:
+                break
+                
+            article_date_str = r.get('date')
+            if article_date_str:
+                # Timezone-aware UTC datetime, compared against an aware cutoff
+                article_date = parse_news_date(article_date_str)
+                if article_date is None:
+                    # Skip to be safe about "freshness", but leave a trace of the format we missed
+                    logger.info("Skipping article with unparseable date %r: %s", article_date_str, r.get('url'))
+                    continue
+                    
+                if article_date >= cutoff_date:
+                    item = {
+                        "headline": r.get('title'),
+                        "source": r.get('source'),
+                        "date": article_date_str,
+                        "url": r.get('url'),
+                        "snippet": r.get('body')
+                    }
+                    kept.append(item)
+                    yield item
+    finally:
+        # Keep every result in the local full-text index for later offline search, in one
+        # write per search (also when the caller stopped early)
+        article_index.index_news(kept, topic)
+
+def _search_news(ddgs: DDGS, topic: str, max_results: int) -> List[Dict[str, str]]:
+    """Collects _iter_search_news into a list."""
+    return list(_iter_search_news(ddgs, topic, max_results))
+
+def iter_sector_news(topic: str, max_results: int = 10) -> Iterator[Dict[str, str]]:
+    """
+    Iterator variant of get_sector_news (unscored). A search error ends the iteration
+    without raising; articles already yielded stay valid.
+    """
+    try:
+        with DDGS() as ddgs:
+            yield from _iter_search_news(ddgs, topic, max_results)
+    except Exception as e:
+        logger.warning("Error searching DuckDuckGo: %s", e)
 
 def get_sector_news(topic: str, max_results: int = 10) -> List[Dict[str, str]]:
     """
     Fetches news articles about the topic using DuckDuckGo News search.
-    Filters out articles older than 3 days.
+    Filters out articles older than 3 days. Each article carries its lexicon
+    polarity/relevance scores (see sentiment_lexicon.score_news).
     """
-    results = []
-    cutoff_date = datetime.now() - timedelta(days=3)
-    
+    return sentiment_lexicon.score_news(list(iter_sector_news(topic, max_results)), topic)
+
+class _RateLimiter:
+    """Thread-safe limiter that lets at most one call start every `min_interval` seconds."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def get_sector_news_batch(topics: List[str],
+                          max_results: int = 10,
+                          max_concurrency: int = NEWS_BATCH_MAX_CONCURRENCY,
+                          min_interval: float = NEWS_BATCH_MIN_INTERVAL) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches news for many topics over one shared DDGS session.
+    Up to `max_concurrency` queries run at once and query starts are spaced at least
+    `min_interval` seconds apart to stay under the search backend's rate limit.
+    Returns {topic: {"results": [...], "elapsed": seconds, "error": message or None}}.
+    """
+    topics = list(dict.fromkeys(topics))  # De-duplicate, keep order
+    batch = {}
+    if not topics:
+        return batch
+
+    limiter = _RateLimiter(min_interval)
+
+    def _fetch(ddgs, topic):
+        limiter.wait()
+        start = time.monotonic()
+        try:
+            results, error = sentiment_lexicon.score_news(_search_news(ddgs, topic, max_results), topic), None
+        except Exception as e:
+            logger.warning("Error searching DuckDuckGo for %s: %s", topic, e)
+            results, error = [], str(e)
+        return {"results": results, "elapsed": round(time.monotonic() - start, 3), "error": error}
+
     try:
         with DDGS() as ddgs:
-            # Search for news from the last week ('w') to ensure we get enough candidates to filter
-            news_gen = ddgs.news(
-                keywords=f"{topic} stock market",
-                region="us-en",
-                timelimit="w", 
-                max_results=max_results * 2 # Fetch more to allow for filtering
-            )
-            
-            for r in news_gen:
-                if len(results) >= max_results:
-                    break
-                    
-                article_date_str = r.get('date')
-                if article_date_str:
-                    try:
-                        # Parse date string to datetime object
-                        article_date = dateutil.parser.parse(article_date_str)
-                        # Remove timezone info for comparison if needed, or ensure both are aware
-                        if article_date.tzinfo is not None:
-                             article_date = article_date.replace(tzinfo=None)
-                        
-                        if article_date >= cutoff_date:
-                            results.append({
-                                "headline": r.get('title'),
-                                "source": r.get('source'),
-                                "date": article_date_str,
-                                "url": r.get('url'),
-                                "snippet": r.get('body')
-                            })
-                    except Exception as e:
-                        # If date parsing fails, we skip or include based on preference. 
-                        # Here we include it but log warning, or just skip. 
-                        # Let's skip to be safe about "freshness".
-                        continue
-                
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(topics)), thread_name_prefix="news") as executor:
+                futures = {topic: executor.submit(_fetch, ddgs, topic) for topic in topics}
+                for topic, future in futures.items():
+                    batch[topic] = future.result()
     except Exception as e:
-        print(f"Error searching DuckDuckGo: {e}")
-        return []
+        logger.warning("Error opening DuckDuckGo session: %s", e)
+        for topic in topics:
+            batch.setdefault(topic, {"results": [], "elapsed": 0.0, "error": str(e)})
 
-    return results
+    return batch
 
-def scrape_article(url: str) -> str:
+def scrape_article(url: str, timeout: Optional[float] = None) -> str:
     """
     Downloads and extracts the main text from a URL.
+    Extracted text is served from the shared disk cache while fresh; older entries are
+    revalidated with a conditional GET and only re-extracted if the page changed.
+    """
+    with tracing.span("scrape_article", url=url) as span:
+        cache_key = normalize_url(url)
+        cached = content_cache.get(cache_key)
+        if cached and time.time() - cached.get("fetched_at", 0) < ARTICLE_FRESH_TTL:
+            span.set(cached=True, chars=len(cached.get("text", "")))
+            return cached.get("text", "")
+
+        try:
+            page = http_client.fetch(
+                url,
+                timeout=timeout or SCRAPE_URL_TIMEOUT,
+                etag=cached.get("etag") if cached else None,
+                last_modified=cached.get("last_modified") if cached else None
+            )
+            span.set(status=page["status"], bytes=len(page["html"] or b""))
+            if page["status"] == 304 and cached:
+                text = cached.get("text", "")
+            elif page["html"]:
+                text = trafilatura.extract(page["html"]) or ""
+            else:
+                return ""
+            span.set(chars=len(text))
+            if text:
+                article_index.index_body(url, text)
+                content_cache.set(cache_key, {
+                    "text": text,
+                    "fetched_at": time.time(),
+                    "etag": page["etag"],
+                    "last_modified": page["last_modified"]
+                })
+            return text
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            logger.warning("Error scraping %s: %s", url, e)
+        
+        return ""
+
+
+def scrape_articles(urls: List[str],
+                    url_timeout: float = SCRAPE_URL_TIMEOUT,
+                    total_timeout: float = SCRAPE_TOTAL_TIMEOUT) -> Dict[str, Any]:
+    """
+    Scrapes several URLs in parallel through the shared scrape queue (see utils.scrape_queue),
+    at urgent priority. URLs already downloaded speculatively come straight from the cache and
+    URLs already in flight are simply waited on.
+    Each download is started with `url_timeout` seconds once a worker picks it up (URLs
+    another caller already has running keep their own timeout) and the whole batch gets
+    `total_timeout` seconds; anything still running after that is abandoned.
+    Returns {"content": {url: text}, "timed_out": [urls], "failed": [urls], "elapsed": seconds}.
     """
+    from utils.scrape_queue import scrape_queue  # Imported here: the queue is built on this module
+
+    urls = list(dict.fromkeys(u for u in urls if u))  # De-duplicate, keep order
+    report = {"content": {}, "timed_out": [], "failed": [], "elapsed": 0.0}
+    if not urls:
+        return report
+
+    start = time.monotonic()
+    batch_deadline = start + total_timeout
+    # URLs that normalize to the same page share one queued download
+    futures = {}
+    for url in urls:
+        futures.setdefault(scrape_queue.submit(url, timeout=url_timeout), []).append(url)
+    pending = set(futures)
+
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            text = trafilatura.extract(downloaded)
-            return text if text else ""
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
-    
-    return ""
+        while pending:
+            now = time.monotonic()
+            if now >= batch_deadline:
+                break
+
+            # Drop anything that has been running longer than its own deadline,
+            # and work out when the nearest deadline falls
+            next_deadline = batch_deadline
+            for future in list(pending):
+                started_at = scrape_queue.started_at(futures[future][0])
+                if started_at is None or future.done():
+                    continue
+                if now - started_at >= url_timeout:
+                    pending.discard(future)
+                    report["timed_out"].extend(futures[future])
+                else:
+                    next_deadline = min(next_deadline, started_at + url_timeout)
+
+            # Sleep until the next completion or the nearest deadline
+            done, pending = wait(pending, timeout=max(0.0, next_deadline - now) + 0.01, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    logger.warning("Error scraping %s: %s", futures[future][0], e)
+                    text = ""
+                for url in futures[future]:
+                    if text:
+                        report["content"][url] = text
+                    else:
+                        report["failed"].append(url)
+    finally:
+        # Whatever is left missed the batch deadline; it keeps running in the queue and warms the cache
+        for future in pending:
+            report["timed_out"].extend(futures[future])
+
+    report["elapsed"] = time.monotonic() - start
+    if report["timed_out"]:
+        logger.warning("Scrape timed out for %d of %d URLs.", len(report['timed_out']), len(urls))
+    return report
@@ -0,0 +1,264 @@
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, AsyncIterator, Callable
+from utils import ai_engine, news_scraper, quotes, tickers, tracing
+from utils.scrape_queue import scrape_queue, PRIORITY_URGENT
+
+logger = logging.getLogger(__name__)
+
+# Bounded queues between stages: a fast stage waits for a slow one instead of piling up work
+PIPELINE_QUEUE_SIZE = 8
+# Articles scraped at once by one pipeline run (the shared scrape queue caps the process total)
+PIPELINE_SCRAPE_CONCURRENCY = 4
+# Threads that run the blocking parts (search, Gemini, yfinance) for all pipeline runs
+PIPELINE_THREADS = 16
+
+_DONE = object()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    The process-wide event loop all pipeline runs share, running in a daemon thread.
+    Streamlit script threads only wait on results, so one session's run never holds
+    up another session's script.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=PIPELINE_THREADS, thread_name_prefix="pipeline"))
+            threading.Thread(target=loop.run_forever, name="pipeline-loop", daemon=True).start()
+            _loop = loop
+    return _loop
+
+def submit(coro) -> Future:
+    """Schedules a coroutine on the pipeline loop and returns a concurrent Future for it."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+async def _iterate_in_thread(make_iterator: Callable[[], Iterator]) -> AsyncIterator:
+    """Drives a blocking iterator from the event loop, one item per executor call."""
+    loop = asyncio.get_running_loop()
+    # Executor threads don't inherit context variables; carry the caller's trace along
+    iterator = await loop.run_in_executor(None, tracing.wrap(make_iterator))
+    while True:
+        item = await loop.run_in_executor(None, tracing.wrap(next), iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+async def fetch_stage(topic: Optional[str], articles: Optional[List[Dict[str, str]]],
+                      max_results: int, out_q: asyncio.Queue, emit):
+    """Stage 1: news items, either searched live for `topic` or the given selection."""
+    try:
+        if articles is not None:
+            for entry in enumerate(articles):
+                await out_q.put(entry)
+        else:
+            index = 0
+            async for item in _iterate_in_thread(lambda: news_scraper.iter_sector_news(topic, max_results)):
+                await emit({"type": "article", "value": item})
+                await out_q.put((index, item))
+                index += 1
+    except Exception:
+        await out_q.put(_DONE)
+        raise
+    await out_q.put(_DONE)
+
+async def scrape_stage(in_q: asyncio.Queue, out_q: asyncio.Queue, emit, report: Dict[str, Any]):
+    """
+    Stage 2: downloads article bodies through the shared scrape queue, at most
+    PIPELINE_SCRAPE_CONCURRENCY at once, and passes (item, body) downstream.
+    The whole stage gets news_scraper.SCRAPE_TOTAL_TIMEOUT seconds; later articles pass
+    through without a body. `report` is filled in scrape_articles' format so the
+    analysis can use these bodies instead of downloading them again.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + news_scraper.SCRAPE_TOTAL_TIMEOUT
+
+    async def worker():
+        while True:
+            entry = await in_q.get()
+            if entry is _DONE:
+                await in_q.put(_DONE)  # Let the other workers see the end too
+                return
+            index, item = entry
+            body = None
+            url = item.get("url")
+            if url:
+                remaining = deadline - loop.time()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    # Shielded: other sessions may be waiting on the same download
+                    body = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(scrape_queue.submit(url, PRIORITY_URGENT))),
+                        timeout=min(news_scraper.SCRAPE_URL_TIMEOUT * 2, remaining)
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except asyncio.TimeoutError:
+                    report["timed_out"].append(url)
+                except Exception as e:
+                    logger.warning("Pipeline scrape failed for %s: %s", url, e)
+                if body:
+                    report["content"][url] = body
+                elif url not in report["timed_out"]:
+                    report["failed"].append(url)
+                await emit({"type": "scraped", "url": url, "ok": bool(body)})
+            await out_q.put((index, item, body))
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(PIPELINE_SCRAPE_CONCURRENCY)))
+    except Exception:
+        await out_q.put(_DONE)
+        raise
+    finally:
+        report["elapsed"] = loop.time() - started
+    await out_q.put(_DONE)
+
+async def _prefetch_quotes(symbols: List[str], emit):
+    loop = asyncio.get_running_loop()
+    try:
+        fetched = await loop.run_in_executor(None, tracing.wrap(quotes.get_quotes), symbols)
+    except Exception as e:
+        logger.warning("Pipeline quote prefetch failed: %s", e)
+        return
+    await emit({"type": "quotes", "value": fetched})
+
+async def quote_stage(in_q: asyncio.Queue, emit):
+    """
+    Stage 3: collects scraped articles and, as each one arrives, starts a quote lookup for
+    the tickers it names so they are already cached when the recommendations need them.
+    Returns the articles in their original order and the still-running lookups.
+    """
+    collected = []
+    seen = set()
+    lookups = []
+    while True:
+        entry = await in_q.get()
+        if entry is _DONE:
+            break
+        index, item, body = entry
+        collected.append((index, item))
+        mentioned = [t for t in tickers.find_tickers(f"{item.get('headline', '')} {item.get('snippet', '')} {body or ''}") if t not in seen]
+        if mentioned:
+            seen.update(mentioned)
+            lookups.append(asyncio.ensure_future(_prefetch_quotes(mentioned, emit)))
+    return [item for _, item in sorted(collected, key=lambda entry: entry[0])], lookups
+
+async def analyze_stage(articles: List[Dict[str, str]], emit, **analysis_options) -> Dict[str, Any]:
+    """
+    Stage 4: the Gemini analysis, forwarding its sentiment/summary/recommendation events.
+    Pass the scrape stage's report as `scrape_report` so the bodies are not downloaded twice.
+    """
+    result = {}
+    async for event in _iterate_in_thread(lambda: ai_engine.analyze_news_stream(articles, **analysis_options)):
+        await emit(event)
+        if event["type"] == "done":
+            result = event["result"]
+    return result
+
+async def run_pipeline(topic: Optional[str] = None, articles: Optional[List[Dict[str, str]]] = None,
+                       max_results: int = 10, analyze: bool = True, emit=None,
+                       **analysis_options) -> Dict[str, Any]:
+    """
+    fetch -> scrape -> quote prefetch -> analyze, with stages connected by bounded queues.
+    Pass `articles` to analyze a selection (with the `topic` it was found for), or only
+    `topic` to search first. `emit` is an async
+    callback receiving progress events. Returns {"articles", "analysis"}.
+    Cancelling the task stops every stage; downloads already running finish in the
+    background and still warm the article cache.
+    """
+    async def _ignore(event):
+        pass
+    emit = emit or _ignore
+
+    news_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    scraped_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    scrape_report = {"content": {}, "timed_out": [], "failed": [], "elapsed": 0.0}
+    stages = [
+        asyncio.ensure_future(fetch_stage(topic, articles, max_results, news_q, emit)),
+        asyncio.ensure_future(scrape_stage(news_q, scraped_q, emit, scrape_report))
+    ]
+    lookups = []
+    try:
+        collected, lookups = await quote_stage(scraped_q, emit)
+        await asyncio.gather(*stages)
+        # Quote lookups keep running alongside the analysis
+        analysis = await analyze_stage(collected, emit, scrape_report=scrape_report, topic=topic,
+                                       **analysis_options) if analyze and collected else None
+        await asyncio.gather(*lookups)
+    finally:
+        for task in stages + lookups:
+            task.cancel()
+    return {"articles": collected, "analysis": analysis}
+
+class PipelineRun:
+    """
+    Handle for a pipeline running on the shared loop, for use from a Streamlit script thread.
+    Iterate `events()` to receive progress events in order; `result()` waits for the outcome.
+    """
+
+    def __init__(self, **kwargs):
+        self._events: "queue.Queue" = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self._future = submit(self._run(**kwargs))
+
+    async def _put(self, event):
+        # Bounded: a consumer that reads slowly pauses the pipeline instead of buffering it all
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                await asyncio.sleep(0.05)
+
+    async def _run(self, **kwargs):
+        try:
+            result = await run_pipeline(emit=self._put, **kwargs)
+        except asyncio.CancelledError:
+            # Nobody is reading any more; don't wait for room in the queue
+            try:
+                self._events.put_nowait(_DONE)
+            except queue.Full:
+                pass
+            raise
+        except Exception:
+            await self._put(_DONE)
+            raise
+        await self._put(_DONE)
+        return result
+
+    def events(self, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields events until the run ends, then raises its exception if it failed.
+        Abandoning the iterator (e.g. on a Streamlit rerun) cancels the run.
+        """
+        try:
+            while True:
+                event = self._events.get(timeout=timeout)
+                if event is _DONE:
+                    break
+                yield event
+            self._future.result()
+        finally:
+            if not self._future.done():
+                self.cancel()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        # Drain events so the run never blocks on a full queue
+        for _ in self.events(timeout):
+            pass
+        return self._future.result(timeout)
+
+    def cancel(self):
+        self._future.cancel()
+
+def start(**kwargs) -> PipelineRun:
+    """Starts run_pipeline(**kwargs) on the shared loop and returns its handle."""
+    return PipelineRun(**kwargs)
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict
+from utils import quotes, tracing
+
+TRADING_DAYS = 252
+# Recommendations that are right when the price rises / falls after the analysis
+BULLISH = ("BUY", "WATCH")
+BEARISH = ("SELL", "AVOID")
+# Extra history before the earliest add date, so a position added on a weekend or holiday
+# still has a close to fall back on
+HISTORY_PADDING_DAYS = 7
+
+def _entry_dates(df: pd.DataFrame) -> pd.Series:
+    """Add dates as tz-naive calendar days (created_at is stored as a UTC timestamp)."""
+    if "created_at" not in df.columns:
+        return pd.Series(pd.Timestamp.today().normalize(), index=df.index)
+    dates = pd.to_datetime(df["created_at"], utc=True, errors="coerce")
+    return dates.dt.tz_convert(None).dt.normalize().fillna(pd.Timestamp.today().normalize())
+
+def position_metrics(df: pd.DataFrame, closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-position performance from a (dates x tickers) frame of daily closes.
+
+    Every position becomes one column of a (dates x positions) price matrix, masked before
+    its add date, so returns, volatility and drawdowns are whole-array NumPy operations
+    instead of a loop over rows. The entry price is `Price` (the price at analysis) when it
+    is known, else the first close on or after the add date.
+    """
+    n = len(df)
+    entry_dates = _entry_dates(df)
+    tickers = df["Ticker"].map(quotes._clean)
+    result = pd.DataFrame(index=df.index)
+
+    if closes.empty or n == 0:
+        for column in ("Entry Price", "Last Close", "Return %", "Volatility %", "Max Drawdown %"):
+            result[column] = np.nan
+        return result
+
+    prices = closes.reindex(columns=tickers.unique()).ffill()
+    matrix = prices.to_numpy(dtype=float)[:, prices.columns.get_indexer(tickers)]  # dates x positions
+    dates = prices.index.to_numpy(dtype="datetime64[ns]")
+    start = np.searchsorted(dates, entry_dates.to_numpy(dtype="datetime64[ns]"))  # first row on/after the add date
+    start = np.minimum(start, len(dates) - 1)  # Added since the last close: that close is the entry
+    held = np.arange(len(dates))[:, None] >= start[None, :]
+    matrix = np.where(held, matrix, np.nan)
+
+    cols = np.arange(n)
+    first_close = matrix[start, cols]
+    last_close = matrix[-1]
+
+    stored = pd.to_numeric(df["Price"], errors="coerce").to_numpy(dtype=float)
+    entry = np.where(stored > 0, stored, first_close)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_returns = np.diff(np.log(matrix), axis=0)
+        valid = np.isfinite(log_returns)
+        counts = valid.sum(axis=0)
+        filled = np.where(valid, log_returns, 0.0)
+        mean = filled.sum(axis=0) / np.maximum(counts, 1)
+        variance = (np.where(valid, log_returns - mean, 0.0) ** 2).sum(axis=0) / np.maximum(counts - 1, 1)
+        volatility = np.where(counts > 1, np.sqrt(variance * TRADING_DAYS), np.nan)
+
+        # Drawdowns are measured against the entry price as well as the running high since
+        running_max = np.fmax.accumulate(np.fmax(np.where(held, matrix, -np.inf), entry[None, :]), axis=0)
+        drawdown = np.nanmin(np.where(held, matrix / running_max - 1, np.nan), axis=0, initial=0.0)
+        drawdown = np.where(np.isfinite(first_close), drawdown, np.nan)
+
+        total_return = last_close / entry - 1
+
+    result["Entry Price"] = entry
+    result["Last Close"] = last_close
+    result["Return %"] = np.round(total_return * 100, 2)
+    result["Volatility %"] = np.round(volatility * 100, 2)
+    result["Max Drawdown %"] = np.round(drawdown * 100, 2)
+    return result
+
+def _hits(df: pd.DataFrame) -> pd.Series:
+    """True/False whether each call was right so far; NaN for unknown actions or unpriced positions."""
+    action = df["Recommendation"].fillna("").astype(str).str.upper().str.strip()
+    returns = df["Return %"]
+    hit = pd.Series(np.nan, index=df.index)
+    hit = hit.mask(action.isin(BULLISH), (returns > 0).astype(float))
+    hit = hit.mask(action.isin(BEARISH), (returns < 0).astype(float))
+    return hit.where(returns.notna())
+
+def compute_analytics(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Performance of every position in a get_portfolio_dataframe() frame, from one batched
+    download of daily closes since the earliest add date.
+
+    Returns `positions` (the frame plus Return %, Volatility %, Max Drawdown % and Hit),
+    `sectors` and `recommendations` aggregate tables, and `summary` headline numbers.
+    """
+    if df.empty:
+        return {"positions": df, "sectors": pd.DataFrame(), "recommendations": pd.DataFrame(), "summary": {}}
+
+    with tracing.span("portfolio_analytics", rows=len(df)):
+        start = (_entry_dates(df).min() - pd.Timedelta(days=HISTORY_PADDING_DAYS)).strftime("%Y-%m-%d")
+        closes = quotes.get_history(df["Ticker"].dropna().unique().tolist(), start=start)
+
+        positions = pd.concat([df, position_metrics(df, closes)], axis=1)
+        positions["Hit"] = _hits(positions)
+
+        sectors = positions.groupby("Sector", sort=False).agg(
+            Positions=("Ticker", "size"),
+            **{
+                "Avg Return %": ("Return %", "mean"),
+                "Median Return %": ("Return %", "median"),
+                "Avg Volatility %": ("Volatility %", "mean"),
+                "Worst Drawdown %": ("Max Drawdown %", "min"),
+                "Hit Rate %": ("Hit", "mean")
+            }
+        )
+        sectors["Hit Rate %"] *= 100
+        sectors = sectors.round(2).sort_values("Avg Return %", ascending=False).reset_index()
+
+        recommendations = positions.assign(
+            Recommendation=positions["Recommendation"].fillna("N/A").astype(str).str.upper().str.strip()
+        ).groupby("Recommendation").agg(
+            Positions=("Ticker", "size"),
+            Scored=("Hit", "count"),
+            **{
+                "Hit Rate %": ("Hit", "mean"),
+                "Avg Return %": ("Return %", "mean"),
+                "Best Return %": ("Return %", "max"),
+                "Worst Return %": ("Return %", "min")
+            }
+        )
+        recommendations["Hit Rate %"] *= 100
+        recommendations = recommendations.round(2).reset_index()
+
+    summary = {
+        "positions": len(positions),
+        "priced": int(positions["Return %"].notna().sum()),
+        "avg_return": positions["Return %"].mean(),
+        "median_return": positions["Return %"].median(),
+        "hit_rate": positions["Hit"].mean() * 100 if positions["Hit"].notna().any() else None,
+        "worst_drawdown": positions["Max Drawdown %"].min()
+    }
+    return {"positions": positions, "sectors": sectors, "recommendations": recommendations, "summary": summary}
@@ -0,0 +1,100 @@
+import os
+import logging
+import time
+import threading
+import streamlit as st
+from typing import List, Dict, Optional, Tuple
+from utils import news_scraper, dedup
+from utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Background refresh of the trending sectors. Interval and max age are in seconds.
+PREFETCH_ENABLED = os.environ.get("MARKETPULSE_PREFETCH", "1") != "0"
+PREFETCH_INTERVAL = int(os.environ.get("MARKETPULSE_PREFETCH_INTERVAL", 10 * 60))
+PREFETCH_SCRAPE = os.environ.get("MARKETPULSE_PREFETCH_SCRAPE", "0") == "1"
+WARM_NEWS_MAX_AGE = int(os.environ.get("MARKETPULSE_WARM_MAX_AGE", 30 * 60))
+
+news_cache = DiskCache("news", ttl=WARM_NEWS_MAX_AGE, max_bytes=20 * 1024 * 1024)
+
+def _topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+def store_news(topic: str, items: List[Dict[str, str]]):
+    """Stores a topic's (already de-duplicated) news list in the shared news cache."""
+    news_cache.set(_topic_key(topic), {"fetched_at": time.time(), "items": items})
+
+def get_warm_news(topic: str, max_age: float = WARM_NEWS_MAX_AGE) -> Optional[Tuple[List[Dict[str, str]], float]]:
+    """
+    Returns (items, age in seconds) if the shared cache holds news for the topic
+    that is at most `max_age` seconds old, otherwise None.
+    """
+    entry = news_cache.get(_topic_key(topic))
+    if not entry or not entry.get("items"):
+        return None
+    age = time.time() - entry["fetched_at"]
+    if age > max_age:
+        return None
+    return entry["items"], age
+
+def refresh_topics(topics: List[str], scrape: bool = PREFETCH_SCRAPE, min_age: float = 0) -> Dict[str, int]:
+    """
+    Fetches news for the topics in one batch and stores it in the shared cache.
+    Topics refreshed less than `min_age` seconds ago (e.g. by another process) are skipped.
+    With `scrape`, the article bodies are also downloaded into the content cache.
+    Returns {topic: number of articles stored}.
+    """
+    stale = [t for t in topics if min_age <= 0 or (get_warm_news(t, max_age=min_age) is None)]
+    if not stale:
+        return {}
+
+    batch = news_scraper.get_sector_news_batch(stale)
+    stored = {}
+    urls = []
+    for topic, outcome in batch.items():
+        if outcome["error"] or not outcome["results"]:
+            continue  # Keep whatever older entry is cached rather than overwrite it with nothing
+        items = dedup.collapse_articles(outcome["results"])
+        store_news(topic, items)
+        stored[topic] = len(items)
+        urls.extend(item.get("url") for item in items)
+
+    if scrape and urls:
+        news_scraper.scrape_articles(urls)
+
+    logger.info("Prefetch refreshed %d of %d topics.", len(stored), len(stale))
+    return stored
+
+class NewsWarmer(threading.Thread):
+    """Daemon thread that keeps the trending sectors warm in the shared news cache."""
+
+    def __init__(self, topics: List[str], interval: float = PREFETCH_INTERVAL, scrape: bool = PREFETCH_SCRAPE):
+        super().__init__(name="news-warmer", daemon=True)
+        self.topics = topics
+        self.interval = interval
+        self.scrape = scrape
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                # Slightly under the interval so a slow cycle never leaves a topic past its age budget
+                refresh_topics(self.topics, scrape=self.scrape, min_age=self.interval * 0.9)
+            except Exception as e:
+                logger.warning("Prefetch error: %s", e)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+@st.cache_resource
+def start_warmer() -> Optional[NewsWarmer]:
+    """
+    Starts one background warmer per process for the trending sectors.
+    Disabled with MARKETPULSE_PREFETCH=0.
+    """
+    if not PREFETCH_ENABLED:
+        return None
+    warmer = NewsWarmer(news_scraper.TRENDING_TOPICS)
+    warmer.start()
+    return warmer
@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+import pandas as pd
+from concurrent.futures import Future
+import yfinance as yf
+from typing import List, Dict, Any, Optional
+from utils import replay, tracing
+
+# Quotes are shared by every session in the process; within QUOTE_TTL seconds no new request is made
+QUOTE_TTL = 60
+# Symbols yfinance could not price are remembered briefly so we don't keep retrying them
+FAILED_QUOTE_TTL = 10 * 60
+# Daily close history changes once a day; re-downloading it every hour is plenty
+HISTORY_TTL = 60 * 60
+
+_quote_cache: Dict[str, Dict[str, Any]] = {}
+_history_cache: Dict[Any, Dict[str, Any]] = {}
+# Downloads in progress per ticker; concurrent callers wait on these instead of downloading again
+_in_flight: Dict[str, Future] = {}
+_cache_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+def _clean(ticker: str) -> str:
+    return str(ticker or "").strip().upper()
+
+def _download_quotes(tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches the latest close for all tickers in one batched yfinance request.
+    During market hours the last daily bar carries the current price.
+    """
+    fetched_at = time.time()
+    quotes = {t: {"price": None, "as_of": None, "fetched_at": fetched_at} for t in tickers}
+    try:
+        with tracing.span("price_lookup", tickers=len(tickers)):
+            data = replay.download(
+                tickers,
+                lambda: yf.download(tickers, period="5d", interval="1d", progress=False,
+                                    auto_adjust=False, threads=True),
+                period="5d", interval="1d"
+            )
+    except Exception as e:
+        logger.warning("Batch quote download failed: %s", e)
+        return quotes
+    if data is None or data.empty or "Close" not in data:
+        return quotes
+
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+    for ticker in tickers:
+        if ticker not in closes:
+            continue
+        series = closes[ticker].dropna()
+        if not series.empty:
+            quotes[ticker]["price"] = float(series.iloc[-1])
+            quotes[ticker]["as_of"] = series.index[-1].strftime("%Y-%m-%d")
+    return quotes
+
+def get_quotes(tickers: List[str], max_age: float = QUOTE_TTL) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns {ticker: {"price", "as_of", "age", "cached"}} for the given tickers.
+    Tickers quoted within `max_age` seconds come from the shared in-memory cache;
+    all others are fetched together in a single request. Tickers another caller is already
+    downloading are waited on rather than requested again.
+    `price` is None when yfinance has no data for the symbol, `age` is seconds since
+    the quote was fetched and `as_of` is the date of the bar it came from.
+    """
+    wanted = list(dict.fromkeys(_clean(t) for t in tickers if _clean(t)))
+    now = time.time()
+
+    with _cache_lock:
+        cached = {t: _quote_cache[t] for t in wanted if t in _quote_cache}
+        missing = [
+            t for t in wanted
+            if t not in cached
+            or now - cached[t]["fetched_at"] > (max_age if cached[t]["price"] is not None else FAILED_QUOTE_TTL)
+        ]
+        waiting = {t: _in_flight[t] for t in missing if t in _in_flight}
+        to_fetch = [t for t in missing if t not in waiting]
+        owned = {t: Future() for t in to_fetch}
+        _in_flight.update(owned)
+
+    if to_fetch:
+        logger.info("Fetching quotes for %d tickers in one request...", len(to_fetch))
+        fresh = {}
+        try:
+            fresh = _download_quotes(to_fetch)
+        finally:
+            with _cache_lock:
+                _quote_cache.update(fresh)
+                for t, future in owned.items():
+                    _in_flight.pop(t, None)
+                    future.set_result(fresh.get(t))
+        cached.update(fresh)
+
+    for t, future in waiting.items():
+        cached[t] = future.result() or {"price": None, "as_of": None, "fetched_at": time.time()}
+
+    now = time.time()
+    return {
+        t: {
+            "price": cached[t]["price"],
+            "as_of": cached[t]["as_of"],
+            "age": round(now - cached[t]["fetched_at"], 1),
+            "cached": t not in missing
+        }
+        for t in wanted
+    }
+
+def get_price(ticker: str, max_age: float = QUOTE_TTL) -> Optional[float]:
+    """Convenience wrapper for a single ticker."""
+    return get_quotes([ticker], max_age).get(_clean(ticker), {}).get("price")
+
+def get_history(tickers: List[str], start: str, max_age: float = HISTORY_TTL) -> pd.DataFrame:
+    """
+    Daily closes from `start` (YYYY-MM-DD) to today for all tickers, fetched in one batched
+    request: a DataFrame indexed by date (tz-naive) with one column per ticker, aligned on
+    trading days. Tickers without data come back as all-NaN columns.
+    """
+    wanted = sorted({_clean(t) for t in tickers if _clean(t)})
+    if not wanted:
+        return pd.DataFrame()
+    key = (tuple(wanted), start)
+    with _cache_lock:
+        cached = _history_cache.get(key)
+    if cached and time.time() - cached["fetched_at"] <= max_age:
+        return cached["closes"]
+
+    logger.info("Fetching price history for %d tickers since %s in one request...", len(wanted), start)
+    closes = pd.DataFrame(columns=wanted, dtype=float)
+    try:
+        with tracing.span("price_history", tickers=len(wanted)) as span:
+            data = replay.download(
+                wanted,
+                lambda: yf.download(wanted, start=start, interval="1d", progress=False,
+                                    auto_adjust=False, threads=True),
+                start=start, interval="1d"
+            )
+            if data is not None and not data.empty and "Close" in data:
+                closes = data["Close"]
+                if isinstance(closes, pd.Series):
+                    closes = closes.to_frame(name=wanted[0])
+                closes = closes.reindex(columns=wanted).astype(float)
+                if closes.index.tz is not None:
+                    closes.index = closes.index.tz_localize(None)
+            span.set(rows=len(closes))
+    except Exception as e:
+        logger.warning("Price history download failed: %s", e)
+        return closes
+
+    with _cache_lock:
+        _history_cache[key] = {"closes": closes, "fetched_at": time.time()}
+    return closes
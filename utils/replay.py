@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+import pandas as pd
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+from utils.date_parser import parse_news_date
+
+# Record/replay of every external call (Gemini, DuckDuckGo, article downloads, yfinance):
+#   off    - call the live services (default)
+#   record - call the live services and save each response as a fixture
+#   replay - answer from fixtures only, never touching the network
+REPLAY_MODE = os.environ.get("MARKETPULSE_REPLAY", "off").lower()
+FIXTURES_DIR = os.environ.get(
+    "MARKETPULSE_FIXTURES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+)
+# Replayed calls sleep for this fraction of their recorded duration (0 = instant, 1 = as recorded)
+REPLAY_LATENCY = float(os.environ.get("MARKETPULSE_REPLAY_LATENCY", 0))
+
+class FixtureNotFound(LookupError):
+    """Raised in replay mode for a call that was never recorded (and has no stand-in)."""
+
+_stand_ins: Dict[str, Callable[[Any], Any]] = {}
+_write_lock = threading.Lock()
+
+def recording() -> bool:
+    return REPLAY_MODE == "record"
+
+def replaying() -> bool:
+    return REPLAY_MODE == "replay"
+
+def set_stand_in(service: str, handler: Optional[Callable[[Any], Any]]):
+    """
+    Registers a function answering unrecorded `service` calls in replay mode. It receives
+    the request key and returns a response in the fixture's (JSON) format. None removes it.
+    """
+    if handler is None:
+        _stand_ins.pop(service, None)
+    else:
+        _stand_ins[service] = handler
+
+def fixture_path(service: str, key: Any) -> str:
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return os.path.join(FIXTURES_DIR, service, f"{digest}.json")
+
+def call(service: str, key: Any, live: Callable[[], Any],
+         encode: Callable[[Any], Any] = lambda value: value,
+         decode: Callable[[Any], Any] = lambda value: value) -> Any:
+    """
+    Runs one external call through the record/replay layer.
+    `key` identifies the request (JSON-serializable), `live` performs it, and `encode` /
+    `decode` convert the live result to and from its JSON fixture form.
+    """
+    if replaying():
+        path = fixture_path(service, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            if service in _stand_ins:
+                return decode(_stand_ins[service](key))
+            raise FixtureNotFound(f"No {service} fixture for {json.dumps(key, default=str)[:200]}")
+        if REPLAY_LATENCY > 0:
+            time.sleep(fixture["elapsed"] * REPLAY_LATENCY)
+        return decode(fixture["response"])
+
+    if not recording():
+        return live()
+
+    start = time.monotonic()
+    value = live()
+    _save_fixture(service, key, time.monotonic() - start, encode(value))
+    return value
+
+def _save_fixture(service: str, key: Any, elapsed: float, response: Any):
+    path = fixture_path(service, key)
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"service": service, "key": key, "elapsed": round(elapsed, 4), "response": response},
+                      f, indent=1, default=str)
+
+# --- Gemini -------------------------------------------------------------------------------
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed response chunk; chunks without text parts (e.g. the final one) give ''."""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+class _Usage:
+    def __init__(self, prompt_tokens: int = 0, output_tokens: int = 0):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+class _Response:
+    """Stand-in for a Gemini response: text, usage_metadata and, when streamed, its chunks."""
+
+    def __init__(self, chunks: List[str], usage: Dict[str, int]):
+        self._chunks = chunks
+        self.text = "".join(chunks)
+        self.usage_metadata = _Usage(usage.get("prompt_tokens", 0), usage.get("output_tokens", 0))
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield _Response([chunk], {})
+
+def _encode_gemini(response) -> Dict[str, Any]:
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "chunks": response._chunks,
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0
+        }
+    }
+
+def _decode_gemini(value: Dict[str, Any]) -> _Response:
+    return _Response(value["chunks"], value.get("usage", {}))
+
+class GenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel (generate_content only) that records or replays.
+    Streamed responses are consumed in full when recorded and replayed chunk by chunk.
+    """
+
+    def __init__(self, model_name: str, system_instruction: Optional[str] = None):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self._model = None
+
+    def _live_model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            kwargs = {"system_instruction": self.system_instruction} if self.system_instruction else {}
+            self._model = genai.GenerativeModel(self.model_name, **kwargs)
+        return self._model
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False):
+        key = [self.model_name, self.system_instruction, prompt, generation_config, stream]
+
+        def live():
+            response = self._live_model().generate_content(prompt, generation_config=generation_config, stream=stream)
+            chunks = [chunk_text(chunk) for chunk in response] if stream else [response.text]
+            recorded = _Response(chunks, {})
+            recorded.usage_metadata = getattr(response, "usage_metadata", None)
+            return recorded
+
+        return call("gemini", key, live, _encode_gemini, _decode_gemini)
+
+def generative_model(model_name: str, system_instruction: Optional[str] = None):
+    """genai.GenerativeModel when running live, the recording/replaying wrapper otherwise."""
+    if REPLAY_MODE == "off":
+        import google.generativeai as genai
+        kwargs = {"system_instruction": system_instruction} if system_instruction else {}
+        return genai.GenerativeModel(model_name, **kwargs)
+    return GenerativeModel(model_name, system_instruction)
+
+# --- DuckDuckGo ---------------------------------------------------------------------------
+
+class DDGS:
+    """Drop-in for duckduckgo_search.DDGS (news search only) that records or replays."""
+
+    def __init__(self):
+        self._ddgs = None
+
+    def __enter__(self):
+        if not replaying():
+            from duckduckgo_search import DDGS as LiveDDGS
+            self._ddgs = LiveDDGS().__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._ddgs is not None:
+            return self._ddgs.__exit__(*exc_info)
+
+    def news(self, **kwargs) -> List[Dict[str, Any]]:
+        return call("ddgs", kwargs, lambda: list(self._ddgs.news(**kwargs)), _encode_news, _decode_news)
+
+def _encode_news(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"recorded_at": time.time(), "results": results}
+
+def _decode_news(value: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Moves publication dates forward by the fixture's age so freshness filters keep passing."""
+    shift = timedelta(seconds=time.time() - value.get("recorded_at", time.time()))
+    results = []
+    for item in value["results"]:
+        published = parse_news_date(item.get("date"))
+        results.append({**item, "date": (published + shift).isoformat()} if published else item)
+    return results
+
+# --- Article downloads --------------------------------------------------------------------
+
+def _encode_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    html = page.get("html")
+    return {**page, "html": base64.b64encode(html).decode("ascii") if html else None}
+
+def _decode_page(value: Dict[str, Any]) -> Dict[str, Any]:
+    html = value.get("html")
+    return {**value, "html": base64.b64decode(html) if html else None}
+
+def fetch_page(url: str, validators: Dict[str, Optional[str]], live: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Records/replays an http_client.fetch result (raw page bytes are stored base64-encoded)."""
+    return call("http", {"url": url, **validators}, live, _encode_page, _decode_page)
+
+# --- yfinance -----------------------------------------------------------------------------
+
+def _encode_frame(data) -> Optional[Dict[str, Any]]:
+    if data is None:
+        return None
+    return {
+        "columns": [list(c) if isinstance(c, tuple) else c for c in data.columns],
+        "index": [ts.isoformat() for ts in data.index],
+        "data": json.loads(data.to_json(orient="values"))
+    }
+
+def _decode_frame(value: Optional[Dict[str, Any]]):
+    if value is None:
+        return None
+    columns = value["columns"]
+    if columns and isinstance(columns[0], list):
+        columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns])
+    return pd.DataFrame(value["data"], index=pd.to_datetime(value["index"]), columns=columns)
+
+def _ticker_frame(data, ticker: str, batch_size: int):
+    """The columns of one ticker from a yf.download frame, as (field, ticker) columns."""
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        try:
+            return data.xs(ticker, axis=1, level=-1, drop_level=False)
+        except KeyError:
+            return None
+    if batch_size != 1:
+        return None
+    frame = data.copy()
+    frame.columns = pd.MultiIndex.from_tuples([(c, ticker) for c in data.columns])
+    return frame
+
+def download(tickers: List[str], live: Callable[[], Any], **kwargs):
+    """
+    Records/replays a yf.download DataFrame. Fixtures are stored per ticker, so a replay
+    may group the recorded tickers differently from the recording (which tickers miss
+    the quote cache depends on timing) and still find every one of them.
+    """
+    tickers = sorted(tickers)
+    if recording():
+        start = time.monotonic()
+        data = live()
+        elapsed = (time.monotonic() - start) / max(len(tickers), 1)
+        for ticker in tickers:
+            _save_fixture("yfinance", {"tickers": [ticker], **kwargs}, elapsed,
+                          _encode_frame(_ticker_frame(data, ticker, len(tickers))))
+        return data
+    if not replaying():
+        return live()
+
+    frames = [
+        call("yfinance", {"tickers": [ticker], **kwargs}, live, _encode_frame, _decode_frame)
+        for ticker in tickers
+    ]
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    return pd.concat(frames, axis=1).sort_index() if frames else None
@@ -0,0 +1,127 @@
+import time
+import itertools
+import threading
+from queue import PriorityQueue
+from concurrent.futures import Future
+from typing import List, Dict, Optional
+from utils import news_scraper, tracing
+from utils.http_client import normalize_url
+
+# Lower number runs first. Articles an analysis is waiting on jump ahead of speculative work.
+PRIORITY_URGENT = 0
+PRIORITY_SPECULATIVE = 10
+
+class _Job:
+    def __init__(self, url: str, priority: int, timeout: float):
+        self.url = url
+        self.priority = priority
+        self.timeout = timeout
+        self.future = Future()
+        self.started_at: Optional[float] = None
+        # Spans of the download land in the trace of whoever queued it first
+        self.scrape = tracing.wrap(news_scraper.scrape_article)
+
+class ScrapeQueue:
+    """
+    Process-wide priority queue of article downloads shared by every session.
+    Each URL is scraped at most once at a time; callers asking for a URL that is already
+    queued or running get the same Future. Results land in the shared article cache,
+    so a URL that finished earlier is served from disk on the next request.
+    """
+
+    def __init__(self, workers: int = news_scraper.SCRAPE_MAX_WORKERS,
+                 url_timeout: float = news_scraper.SCRAPE_URL_TIMEOUT):
+        self.workers = workers
+        self.url_timeout = url_timeout
+        self._queue = PriorityQueue()
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"scrape-queue-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            priority, _, key = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(key)
+                # Skip stale entries: cancelled, already started, or re-queued at another priority
+                if job is None or job.started_at is not None or job.priority != priority:
+                    continue
+                if not job.future.set_running_or_notify_cancel():
+                    del self._jobs[key]
+                    continue
+                job.started_at = time.monotonic()
+            try:
+                job.future.set_result(job.scrape(job.url, timeout=job.timeout))
+            except Exception as e:
+                job.future.set_exception(e)
+            finally:
+                with self._lock:
+                    if self._jobs.get(key) is job:
+                        del self._jobs[key]
+
+    def submit(self, url: str, priority: int = PRIORITY_URGENT, timeout: Optional[float] = None) -> Future:
+        """
+        Queues a URL (or raises the priority of an already queued one) and returns its Future.
+        The download gets `timeout` seconds (default: the queue's url_timeout); a caller
+        asking for a shorter timeout on a job that has not started yet tightens it.
+        """
+        key = normalize_url(url)
+        timeout = self.url_timeout if timeout is None else timeout
+        with self._lock:
+            self._ensure_workers()
+            job = self._jobs.get(key)
+            if job is None:
+                job = _Job(url, priority, timeout)
+                self._jobs[key] = job
+                self._queue.put((priority, next(self._seq), key))
+            elif job.started_at is None:
+                job.timeout = min(job.timeout, timeout)
+                if priority < job.priority:
+                    job.priority = priority
+                    self._queue.put((priority, next(self._seq), key))
+            return job.future
+
+    def prefetch(self, urls: List[str]):
+        """Starts speculative downloads; they run only when no urgent work is waiting."""
+        for url in urls:
+            if url:
+                self.submit(url, PRIORITY_SPECULATIVE)
+
+    def cancel(self, urls: List[str]) -> int:
+        """
+        Drops queued downloads that nobody needs any more. Downloads already running
+        are left to finish (their results still warm the cache). Returns how many were dropped.
+        """
+        cancelled = 0
+        with self._lock:
+            for url in urls:
+                key = normalize_url(url) if url else None
+                job = self._jobs.get(key)
+                # Only speculative work is dropped; another session's analysis may be waiting on urgent jobs
+                if (job is not None and job.started_at is None and job.priority >= PRIORITY_SPECULATIVE
+                        and job.future.cancel()):
+                    del self._jobs[key]
+                    cancelled += 1
+        return cancelled
+
+    def started_at(self, url: str) -> Optional[float]:
+        """Monotonic start time of a running download, or None if it is queued or unknown."""
+        with self._lock:
+            job = self._jobs.get(normalize_url(url))
+            return job.started_at if job else None
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+# Shared by all Streamlit sessions in this process
+scrape_queue = ScrapeQueue()
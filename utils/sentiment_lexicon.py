@@ -0,0 +1,122 @@
+import os
+import re
+import csv
+import functools
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "finance_lexicon.csv")
+CATEGORIES = ("positive", "negative", "uncertainty", "financial")
+
+# Headline words count this many times over body/snippet words
+HEADLINE_WEIGHT = 3
+# Lexicon hits per token at which the finance-density part of relevance saturates at 1
+RELEVANCE_SATURATION = 0.12
+# |polarity| above this is labelled Positive/Negative rather than Neutral
+POLARITY_THRESHOLD = 0.2
+
+_TOKEN_RE = re.compile(r"[a-z][a-z'-]+")
+
+@functools.lru_cache(maxsize=1)
+def load_lexicon(path: str = LEXICON_PATH) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Reads the bundled word list once. Returns the vocabulary ({word: column}) and a
+    (words x categories) 0/1 matrix, since a word may belong to several categories.
+    """
+    vocab: Dict[str, int] = {}
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(line for line in f if not line.startswith("#")):
+            word, category = row["word"].strip().lower(), row["category"].strip().lower()
+            if category in CATEGORIES:
+                pairs.append((vocab.setdefault(word, len(vocab)), CATEGORIES.index(category)))
+    weights = np.zeros((len(vocab), len(CATEGORIES)), dtype=np.float32)
+    for word_id, category_id in pairs:
+        weights[word_id, category_id] = 1.0
+    return vocab, weights
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+def score_texts(headlines: List[str], bodies: List[str], topic: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Lexicon scores for many documents at once. Token ids of every document are laid out in
+    one flat array and counted with a single bincount into a (documents x vocabulary)
+    matrix, which one matrix product turns into per-category hit counts.
+
+    Returns arrays (one value per document) of `polarity` in [-1, 1] (positive minus
+    negative hits over their sum), `relevance` in [0, 1] (density of finance terms, damped
+    when the topic's words do not appear) and `hits`.
+    """
+    vocab, weights = load_lexicon()
+    n, size = len(headlines), len(vocab)
+    ids, docs, lengths = [], [], np.zeros(n, dtype=np.float32)
+    topic_words = {w for w in _tokens(topic) if len(w) > 2}
+    topic_share = np.ones(n, dtype=np.float32)
+
+    for i, (headline, body) in enumerate(zip(headlines, bodies)):
+        head_tokens, body_tokens = _tokens(headline), _tokens(body)
+        tokens = head_tokens * HEADLINE_WEIGHT + body_tokens
+        lengths[i] = len(tokens)
+        known = [vocab[t] for t in tokens if t in vocab]
+        ids.extend(known)
+        docs.extend([i] * len(known))
+        if topic_words:
+            topic_share[i] = len(topic_words.intersection(head_tokens + body_tokens)) / len(topic_words)
+
+    if not n:
+        empty = np.zeros(0, dtype=np.float32)
+        return {"polarity": empty, "relevance": empty, "hits": empty}
+
+    counts = np.bincount(np.asarray(docs, dtype=np.int64) * size + np.asarray(ids, dtype=np.int64),
+                         minlength=n * size).reshape(n, size).astype(np.float32)
+    by_category = counts @ weights  # documents x categories
+    positive, negative = by_category[:, 0], by_category[:, 1]
+    hits = by_category.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        polarity = np.where(positive + negative > 0, (positive - negative) / (positive + negative), 0.0)
+        density = np.where(lengths > 0, hits / lengths, 0.0)
+    relevance = np.minimum(density / RELEVANCE_SATURATION, 1.0) * (0.5 + 0.5 * topic_share)
+    return {"polarity": polarity.astype(np.float32), "relevance": relevance.astype(np.float32), "hits": hits}
+
+def label(polarity: float) -> str:
+    if polarity > POLARITY_THRESHOLD:
+        return "Positive"
+    if polarity < -POLARITY_THRESHOLD:
+        return "Negative"
+    return "Neutral"
+
+def score_news(items: List[Dict[str, Any]], topic: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Adds `polarity`, `relevance` and `tone` to each news item (in place) and returns the
+    list. Scored from the headline and snippet.
+    """
+    if not items:
+        return items
+    scores = score_texts(
+        [item.get("headline") or "" for item in items],
+        [item.get("snippet") or "" for item in items],
+        topic
+    )
+    for item, polarity, relevance in zip(items, scores["polarity"], scores["relevance"]):
+        item["polarity"] = round(float(polarity), 3)
+        item["relevance"] = round(float(relevance), 3)
+        item["tone"] = label(item["polarity"])
+    return items
+
+def select_top(items: List[Dict[str, Any]], k: int, min_relevance: float = 0.0,
+               min_keep: int = 1) -> List[Dict[str, Any]]:
+    """
+    The `k` most relevant scored items with relevance of at least `min_relevance`, in their
+    original order. At least `min_keep` items are kept however low they score.
+    """
+    if not items:
+        return items
+    relevance = np.array([item.get("relevance", 0.0) for item in items], dtype=np.float32)
+    order = np.argsort(-relevance, kind="stable")
+    keep = order[:k] if k and k > 0 else order
+    keep = keep[relevance[keep] >= min_relevance]
+    if len(keep) < min_keep:
+        keep = order[:min_keep]
+    return [items[i] for i in np.sort(keep)]
@@ -0,0 +1,140 @@
+import re
+import numpy as np
+from typing import List, Dict, Tuple, Any
+
+# Rough token estimate for Gemini-style tokenizers (~4 characters per token in English prose)
+CHARS_PER_TOKEN = 4
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+LEAD_BONUS = 0.15  # News puts key facts up front; give the opening sentences a small boost
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])[\"'”’)]?\s+(?=[A-Z0-9\"'“‘(])|\n+")
+_WORD_RE = re.compile(r"[a-z][a-z0-9'-]+")
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our ours out over own said same she should so some
+such than that the their them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+""".split())
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s and s.strip()]
+
+def rank_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    Scores sentences with TextRank over TF-IDF cosine similarity.
+    The term matrix, similarity graph and power iteration are all NumPy array ops.
+    """
+    n = len(sentences)
+    if n <= 2:
+        return np.ones(n)
+
+    vocab = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD_RE.findall(sentence.lower()):
+            if word in _STOPWORDS:
+                continue
+            rows.append(i)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    if not vocab:
+        return np.ones(n)
+
+    tf = np.zeros((n, len(vocab)))
+    np.add.at(tf, (np.array(rows), np.array(cols)), 1.0)
+    idf = np.log((1 + n) / (1 + np.count_nonzero(tf, axis=0))) + 1.0
+    tfidf = tf * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+    similarity = tfidf @ tfidf.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Row-normalized transition matrix; sentences with no links spread evenly
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / n), where=out_weight > 0)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+
+    lead = LEAD_BONUS * scores.max() * np.exp(-np.arange(n) / 3.0)
+    return scores + lead
+
+def compress_text(text: str, max_tokens: int) -> str:
+    """
+    Extractive summary of `text` that fits in `max_tokens`: the highest ranked sentences,
+    kept in their original order. Text already within budget is returned unchanged.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    sentences = split_sentences(text)
+    scores = rank_sentences(sentences)
+    lengths = np.array([estimate_tokens(s) + 1 for s in sentences])
+
+    chosen = []
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        if used + lengths[i] <= max_tokens:
+            chosen.append(i)
+            used += lengths[i]
+
+    if not chosen:
+        # A single sentence longer than the whole budget; fall back to its head
+        return sentences[int(np.argmax(scores))][:max_tokens * CHARS_PER_TOKEN]
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+def allocate_budget(token_counts: List[int], total_budget: int) -> List[int]:
+    """
+    Splits a token budget across articles by water-filling: short articles keep all their
+    tokens and the remainder is shared equally among the longer ones.
+    """
+    budgets = [0] * len(token_counts)
+    remaining = max(0, total_budget)
+    pending = sorted(range(len(token_counts)), key=lambda i: token_counts[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending[0]
+        if token_counts[i] <= share:
+            budgets[i] = token_counts[i]
+            remaining -= token_counts[i]
+            pending.pop(0)
+        else:
+            for j in pending:
+                budgets[j] = share
+            break
+    return budgets
+
+def compress_articles(bodies: Dict[str, str], total_budget: int) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+    """
+    Compresses article bodies (key -> text) so that together they fit in `total_budget` tokens.
+    Returns the compressed bodies and per-article stats (original/compressed tokens, ratio).
+    """
+    keys = list(bodies)
+    counts = [estimate_tokens(bodies[k]) for k in keys]
+    budgets = allocate_budget(counts, total_budget)
+
+    compressed = {}
+    stats = []
+    for key, count, budget in zip(keys, counts, budgets):
+        text = compress_text(bodies[key], budget)
+        compressed[key] = text
+        kept = estimate_tokens(text)
+        stats.append({
+            "key": key,
+            "original_tokens": count,
+            "compressed_tokens": kept,
+            "ratio": round(kept / count, 3) if count else 1.0
+        })
+    return compressed, stats
@@ -0,0 +1,174 @@
+import os
+import re
+import csv
+import functools
+from collections import deque
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+# Bundled symbol table (symbol, exchange, name, aliases); point this at a full exchange
+# listing in the same format to recognise more companies
+SYMBOLS_PATH = os.environ.get(
+    "MARKETPULSE_SYMBOLS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "symbols.csv")
+)
+# Only quote recommended tickers found in the symbol table; otherwise any well-formed symbol is tried
+STRICT_TICKERS = os.environ.get("MARKETPULSE_STRICT_TICKERS", "0") == "1"
+
+# Symbols that are also everyday words or initials; bare mentions only count as "$NOW" or "(NYSE: NOW)"
+AMBIGUOUS_SYMBOLS = {
+    "AI", "ALL", "ARM", "BE", "CAT", "COST", "DE", "GE", "HOOD", "HUT", "IT", "LOW", "NET", "NOW",
+    "NXT", "ON", "ORA", "PATH", "RUN", "SNOW", "TAN", "TEAM", "WOLF"
+}
+_WELL_FORMED_RE = re.compile(r"^[A-Z]{1,5}(?:[.-][A-Z]{1,2})?$")
+_MARKER_RE = re.compile(r"(?:\$|(?:NYSE|NASDAQ|Nasdaq|NYSE American|AMEX|NYSEARCA)\s*:\s*)$")
+# Legal-form suffixes ignored when comparing a whole company name ("NVIDIA Corp." ~ "Nvidia")
+_SUFFIX_RE = re.compile(
+    r"(?:[\s,]+(?:inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|n\.?v|s\.?a|ag|se)\.?)+$",
+    re.IGNORECASE
+)
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton: finds every occurrence of every pattern in one pass over the
+    text, in time linear in the text length plus the number of matches.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._link()
+
+    def _add(self, pattern: str, value: Any):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value))
+
+    def _link(self):
+        """Breadth-first failure links; each node also inherits the matches of its failure node."""
+        todo = deque(self._goto[0].values())
+        while todo:
+            node = todo.popleft()
+            for ch, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                todo.append(child)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Yields (start, end, value) for every pattern occurrence, ordered by end position."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i + 1 - length, i + 1, value
+
+@functools.lru_cache(maxsize=1)
+def load_symbols(path: str = SYMBOLS_PATH) -> Dict[str, Dict[str, str]]:
+    """{symbol: {"exchange", "name", "aliases"}} from the symbol table, read once."""
+    symbols = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(line for line in f if not line.startswith("#")):
+            symbol = row["symbol"].strip().upper()
+            aliases = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+            symbols[symbol] = {"exchange": row["exchange"].strip(), "name": row["name"].strip(), "aliases": aliases}
+    return symbols
+
+@functools.lru_cache(maxsize=1)
+def _matcher() -> AhoCorasick:
+    """
+    One automaton over the lower-cased text for both symbols and company names; the
+    original text is checked afterwards for case and word boundaries.
+    """
+    patterns = []
+    for symbol, info in load_symbols().items():
+        for form in {symbol, symbol.replace("-", ".")}:
+            patterns.append((form.lower(), ("symbol", symbol, form)))
+        for name in [info["name"]] + info["aliases"]:
+            patterns.append((name.lower(), ("name", symbol, name)))
+    return AhoCorasick(patterns)
+
+def _is_word(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not (before.isalnum() or after.isalnum())
+
+def _mentions(text: str) -> Iterator[Tuple[int, int, str, str]]:
+    """Yields (start, end, kind, symbol) for every accepted symbol or company-name match."""
+    for start, end, (kind, symbol, form) in _matcher().iter_matches(text.lower()):
+        if not _is_word(text, start, end):
+            continue
+        if kind == "symbol":
+            if text[start:end] != form:
+                continue  # Symbols are written in capitals
+            if (len(symbol) <= 2 or symbol in AMBIGUOUS_SYMBOLS) and not _MARKER_RE.search(text[max(0, start - 16):start]):
+                continue
+        elif form[0].isupper() and not text[start].isupper():
+            continue  # "apple" the fruit, not "Apple"
+        yield start, end, kind, symbol
+
+def find_tickers(text: str) -> List[str]:
+    """
+    Symbols of the companies an article mentions, in order of first appearance: explicit
+    symbols ("NVDA", "$NVDA", "(NASDAQ: NVDA)") and company names or short names ("Nvidia").
+    Only companies in the symbol table are recognised.
+    """
+    found: Dict[str, int] = {}
+    for start, end, kind, symbol in _mentions(text or ""):
+        found.setdefault(symbol, start)
+    return sorted(found, key=found.get)
+
+def symbol_for_name(company_name: str, whole: bool = True) -> Optional[str]:
+    """
+    The listed symbol of a company name. With `whole`, a table name must cover the entire
+    name apart from legal suffixes, so "Apple Hospitality REIT" does not resolve to AAPL.
+    """
+    name = (company_name or "").strip()
+    if whole:
+        name = _SUFFIX_RE.sub("", name)
+    for start, end, kind, symbol in _mentions(name):
+        if kind == "name" and (not whole or (start == 0 and end == len(name))):
+            return symbol
+    return None
+
+def is_listed(symbol: str) -> bool:
+    return str(symbol or "").strip().upper() in load_symbols()
+
+def resolve(ticker: Optional[str], company_name: Optional[str] = None) -> Tuple[Optional[str], bool]:
+    """
+    Checks a (possibly LLM-invented) ticker before any network lookup. Returns the symbol
+    to quote and whether it is in the symbol table:
+      - a listed symbol is returned as is ("BRK.B" is normalised to "BRK-B"),
+      - a well-formed unlisted symbol is replaced only when the whole company name is a
+        listed company, otherwise it is returned unverified (None when STRICT_TICKERS),
+      - a malformed one ("N/A", "OpenAI") is looked up by any listed name in the company
+        name, or is None.
+    """
+    symbol = str(ticker or "").strip().upper().lstrip("$")
+    symbols = load_symbols()
+    for candidate in (symbol, symbol.replace(".", "-")):
+        if candidate in symbols:
+            return candidate, True
+    well_formed = bool(_WELL_FORMED_RE.match(symbol))
+    if company_name:
+        named = symbol_for_name(company_name, whole=well_formed)
+        if named:
+            return named, True
+    if well_formed and not STRICT_TICKERS:
+        return symbol, False
+    return None, False
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+import functools
+import streamlit as st
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished spans are appended here as JSON lines when set
+TRACE_FILE = os.environ.get("MARKETPULSE_TRACE_FILE")
+# Port of the local Prometheus-text endpoint (GET /metrics); unset disables it
+METRICS_PORT = int(os.environ.get("MARKETPULSE_METRICS_PORT", 0)) or None
+
+# Duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Numeric span attributes that are also summed into counters (payload sizes, token counts)
+COUNTED_ATTRIBUTES = ("bytes", "chars", "prompt_tokens", "output_tokens", "rows", "tickers")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("marketpulse_span", default=None)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("marketpulse_trace", default=None)
+
+_metrics_lock = threading.Lock()
+_durations: Dict[str, Dict[str, Any]] = {}
+_counters: Dict[str, Dict[str, float]] = {}
+_file_lock = threading.Lock()
+
+class Span:
+    """One timed operation. Attributes set with `set` end up in every export."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"], trace: Optional["Trace"]):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = trace.trace_id if trace else None
+        self.thread = threading.current_thread().name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "thread": self.thread,
+            "start": self.started_at,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+class Trace:
+    """Collects every span finished while it is active, including spans in worker threads started from it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span.to_dict())
+
+    def waterfall(self) -> List[Dict[str, Any]]:
+        """Spans ordered by start time, with start offsets (seconds) relative to the trace."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return [{**s, "offset": round(s["start"] - self.started_at, 4)} for s in spans]
+
+def _record(span: Span):
+    with _metrics_lock:
+        stats = _durations.setdefault(span.name, {"count": 0, "sum": 0.0, "errors": 0, "buckets": [0] * len(DURATION_BUCKETS)})
+        stats["count"] += 1
+        stats["sum"] += span.duration
+        if span.error:
+            stats["errors"] += 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if span.duration <= bound:
+                stats["buckets"][i] += 1
+        counters = _counters.setdefault(span.name, {})
+        for key in COUNTED_ATTRIBUTES:
+            value = span.attributes.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                counters[key] = counters.get(key, 0) + value
+
+    if TRACE_FILE:
+        line = json.dumps(span.to_dict(), default=str)
+        with _file_lock:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times the enclosed block as a span named `name`. Yields the Span so callers can add
+    attributes (sizes, token counts) once they are known.
+    """
+    parent = _current_span.get()
+    trace = _current_trace.get()
+    current = Span(name, attributes, parent, trace)
+    # set() rather than a reset token: generators may finish a span in another context copy
+    _current_span.set(current)
+    try:
+        yield current
+    except GeneratorExit:
+        current.set(abandoned=True)  # A streaming consumer stopped reading
+        raise
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - current._start
+        _current_span.set(parent)
+        _record(current)
+        if trace is not None:
+            trace.add(current)
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def trace(name: str):
+    """Collects the spans of one request (e.g. one analysis) into a Trace for the waterfall."""
+    current = Trace(name)
+    token = _current_trace.set(current)
+    try:
+        with span(name):
+            yield current
+    finally:
+        _current_trace.reset(token)
+
+def wrap(fn: Callable) -> Callable:
+    """Binds `fn` to the caller's tracing context, for work handed to another thread."""
+    context = contextvars.copy_context()
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+# --- Export -------------------------------------------------------------------------------
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def prometheus_text() -> str:
+    """All span metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP marketpulse_span_duration_seconds Duration of traced operations.",
+        "# TYPE marketpulse_span_duration_seconds histogram"
+    ]
+    with _metrics_lock:
+        durations = {name: {**stats, "buckets": list(stats["buckets"])} for name, stats in _durations.items()}
+        counters = {name: dict(values) for name, values in _counters.items()}
+
+    for name, stats in sorted(durations.items()):
+        label = _label(name)
+        for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+            lines.append(f'marketpulse_span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+        lines.append(f'marketpulse_span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'marketpulse_span_duration_seconds_sum{{span="{label}"}} {stats["sum"]:.6f}')
+        lines.append(f'marketpulse_span_duration_seconds_count{{span="{label}"}} {stats["count"]}')
+
+    lines.append("# HELP marketpulse_span_errors_total Traced operations that raised.")
+    lines.append("# TYPE marketpulse_span_errors_total counter")
+    for name, stats in sorted(durations.items()):
+        lines.append(f'marketpulse_span_errors_total{{span="{_label(name)}"}} {stats["errors"]}')
+
+    for key in COUNTED_ATTRIBUTES:
+        metric = f"marketpulse_span_{key}_total"
+        rows = [(name, values[key]) for name, values in sorted(counters.items()) if key in values]
+        if rows:
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f'{metric}{{span="{_label(name)}"}} {value}' for name, value in rows)
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+@st.cache_resource
+def start_metrics_server(port: Optional[int] = METRICS_PORT):
+    """Serves GET /metrics on localhost:`port` from a daemon thread (once per process)."""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics endpoint not started on port %s: %s", port, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving Prometheus metrics on http://127.0.0.1:%s/metrics", port)
+    return server
@@ -16,10 +16,10 @@ try:
     from utils import news_scraper
     print("News Scraper import successful.")
     
-    # Test search (lightweight)
+    # Test search (lightweight). With MARKETPULSE_REPLAY=replay this runs offline from recorded fixtures.
     try:
-        print("Testing Yahoo Finance Search...")
-        results = news_scraper.search_yahoo_finance("Apple", max_results=1)
+        print("Testing DuckDuckGo News Search...")
+        results = news_scraper.get_sector_news("Apple", max_results=1)
         if results:
             print(f"Search successful. Found: {results[0]['headline']}")
         else: